@@ -7,167 +7,253 @@ description: This file contains the ada boost learning algorithm
 
 import math
 import sys
-import pickle
+from collections import Counter
 from feature import *
 from decision_tree import *
 
-def normalize(w):
+def normalize(w, counts=None):
     """
     The normalization function used in ada boost
     :param w: original list of weight
+    :param counts: number of entries sharing each weight (1 each by default)
     :return: normalized list of weight
     """
-    factor = 1 / sum(w)
+    if counts is None:
+        factor = 1 / sum(w)
+    else:
+        factor = 1 / sum(w[i] * counts[i] for i in range(len(w)))
     for i in range(len(w)):
         w[i] = w[i] * factor
     return w
 
 
+def distinct(example):
+    """
+    Grouping the equal entries of a training set, which always get the same
+    prediction and weight in ada boost
+    :param example: training set (a list or a :class:`~PackedSet`)
+    :return: a list of the distinct entries and a list of their number
+    """
+    if isinstance(example, PackedSet):
+        groups = Counter(zip(*example.entries()))
+        entries = []
+        for mask, label in groups:
+            entry = unpack(mask, example.width)
+            entry.append(example.languages[label])
+            entries.append(entry)
+        return entries, list(groups.values())
+    groups = Counter(map(tuple, example))
+    return list(groups), list(groups.values())
+
+
+def weakHypothesis(index, feature):
+    """
+    Creating the weak hypothesis of a registered feature, voting for the
+    language type of the feature when it is True and the other one otherwise
+    :param index: the feature position in the entries
+    :param feature: the :class:`~Feature`
+    :return: the hypothesis function of an entry in list form
+    """
+    other = LANGUAGES[1] if feature.vote == LANGUAGES[0] else LANGUAGES[0]
+
+    def hypothesis(list):
+        if list[index] is True:
+            return feature.vote
+        else:
+            return other
+    return hypothesis
+
+
 class AdaBoost:
     """
     The AdaBoost class representing the ada boost learning algorithm
     """
-    def __init__(self):
+    def __init__(self, features=FEATURES):
         """
-        self.hypothesis contians all 10 features as its hypothesis
+        self.hypothesis contians the weak hypothesis of every registered feature
         self.weight is the weight of hypothesis
+        self.flip is the bits of the features voting for English when True
+        self.languages is the language types of the votes
+        self.trueVote, self.falseVote are the language type (as index of
+        self.languages) voted by each hypothesis when its feature is True and
+        False, learned by :func:`~multiclassTraining` (None for the English /
+        Dutch votes of the registry)
         """
-        self.hypothesis = []
-        self.hypothesis.append(self.h0)
-        self.hypothesis.append(self.h1)
-        self.hypothesis.append(self.h2)
-        self.hypothesis.append(self.h3)
-        self.hypothesis.append(self.h4)
-        self.hypothesis.append(self.h5)
-        self.hypothesis.append(self.h6)
-        self.hypothesis.append(self.h7)
-        self.hypothesis.append(self.h8)
-        self.hypothesis.append(self.h9)
+        self.hypothesis = [weakHypothesis(i, features[i]) for i in range(len(features))]
         # for n in nodeList:
         #     self.hypothesis.append((n.hypothesis, n.decision))
         self.weight = []
-    
-    def h0(self, list):
-        if list[0] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h1(self, list):
-        if list[1] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h2(self, list):
-        if list[2] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h3(self, list):
-        if list[3] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h4(self, list):
-        if list[4] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h5(self, list):
-        if list[5] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h6(self, list):
-        if list[6] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h7(self, list):
-        if list[7] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h8(self, list):
-        if list[8] is True:
-            return "nl"
-        else:
-            return "en"
-
-    def h9(self, list):
-        if list[9] is True:
-            return "nl"
-        else:
-            return "en"
+        self.flip = 0
+        for i in range(len(features)):
+            if features[i].vote != "nl":
+                self.flip |= 1 << i
+        self.languages = list(LANGUAGES)
+        self.trueVote = None
+        self.falseVote = None
 
     def training(self, example, hypo):
         """
-        Performing the ada boost learning algorithm and updating the weight list
+        Performing the ada boost learning algorithm and updating the weight list.
+        Each hypothesis is evaluated once on each distinct entry, and the
+        weight of a distinct entry stands for all its equal entries
         :param example: training set
         :param hypo: original hypothesis list
         :return: None
         """
         hAmount = len(hypo)
         eAmount = len(example)
-        w = [1/eAmount for _ in range(eAmount)]
+        entries, counts = distinct(example)
+        dAmount = len(entries)
+        seen = set(e[-1] for e in entries)
+        if not seen <= set(LANGUAGES):
+            languages = [x for x in listLanguages(entries) if x in seen]
+            self.multiclassTraining(entries, counts, languages, hAmount)
+            return
+        correct = [[h(e) == e[-1] for e in entries] for h in hypo]
+        w = [1/eAmount for _ in range(dAmount)]
         z = [1 for _ in range(hAmount)]
         for k in range(hAmount):
             error = 0
-            for j in range(eAmount):
-                if hypo[k](example[j]) != example[j][-1]:
-                    error += w[j]
+            for j in range(dAmount):
+                if not correct[k][j]:
+                    error += w[j] * counts[j]
             if error <= 0 or error >= 1:
                 continue
-            for j in range(eAmount):
-                if hypo[k](example[j]) == example[j][-1]:
+            for j in range(dAmount):
+                if correct[k][j]:
                     w[j] = w[j] * error / (1 - error)
-            w = normalize(w)
+            w = normalize(w, counts)
             z[k] = math.log((1 - error) / error)
         self.weight = z
 
+    def multiclassTraining(self, entries, counts, languages, hAmount):
+        """
+        Performing the multiclass ada boost (SAMME) on other language types
+        than English and Dutch. The hypothesis of each feature votes for the
+        most weighted language type of the entries with the feature True, and
+        of those with the feature False
+        :param entries: the distinct entries of the training set
+        :param counts: the number of each distinct entry
+        :param languages: the language types of the training set
+        :param hAmount: the number of hypothesis (the first hAmount features)
+        :return: None
+        """
+        k = len(languages)
+        dAmount = len(entries)
+        label = [languages.index(e[-1]) for e in entries]
+        w = [1 / sum(counts) for _ in range(dAmount)]
+        z = [0 for _ in range(hAmount)]
+        self.trueVote = array("B")
+        self.falseVote = array("B")
+        for i in range(hAmount):
+            true = [0] * k
+            false = [0] * k
+            for j in range(dAmount):
+                if entries[j][i]:
+                    true[label[j]] += w[j] * counts[j]
+                else:
+                    false[label[j]] += w[j] * counts[j]
+            self.trueVote.append(majority(true))
+            self.falseVote.append(majority(false))
+            correct = [(self.trueVote[i] if entries[j][i] else self.falseVote[i]) == label[j] for j in range(dAmount)]
+            error = 0
+            for j in range(dAmount):
+                if not correct[j]:
+                    error += w[j] * counts[j]
+            # a hypothesis no better than chance (or without error) gets no vote
+            if error <= 0 or error >= 1 - 1 / k:
+                continue
+            z[i] = math.log((1 - error) / error) + math.log(k - 1)
+            for j in range(dAmount):
+                if not correct[j]:
+                    w[j] = w[j] * (1 - error) * (k - 1) / error
+            w = normalize(w, counts)
+        self.languages = languages
+        self.weight = z
+
+    def score(self, list):
+        """
+        Weighting the vote of every hypothesis on a single entry, as the dot
+        product of the weight list with the +1 (Dutch) / -1 (English) votes
+        :param list: a single list with only boolean value, or a feature mask
+        :return: the sum of the votes (Dutch if not negative)
+        """
+        if not isinstance(list, int):
+            list = pack(list)
+        list ^= self.flip
+        return sum([w if list >> i & 1 else -w for i, w in enumerate(self.weight)])
+
     def testSingle(self, list):
         """
         Testing a single entry, find the corresponding language type prediction
-        :param test: a single list with only boolean value
+        :param test: a single list with only boolean value, or a feature mask
         :return: the language type
         """
-        hx = []
-        for i in range(len(self.hypothesis)):
-            if self.hypothesis[i](list) == "nl":
-                hx.append(self.weight[i])
-            elif self.hypothesis[i](list) == "en":
-                hx.append(-self.weight[i])
-        if sum(hx) >= 0:
+        if self.trueVote is not None:
+            if not isinstance(list, int):
+                list = pack(list)
+            votes = [0] * len(self.languages)
+            for i in range(len(self.weight)):
+                if list >> i & 1:
+                    votes[self.trueVote[i]] += self.weight[i]
+                else:
+                    votes[self.falseVote[i]] += self.weight[i]
+            return self.languages[majority(votes)]
+        if self.score(list) >= 0:
             return "nl"
         else:
             return "en"
 
     def testAll(self, list):
         """
-        Testing all entries from a testing set
+        Testing all entries from a testing set, scoring each distinct entry once
         :param list: the testing set
         :return: a list of all prediction
         """
+        decision = {}
         result = []
         for s in list:
-            result.append(self.testSingle(s))
+            key = s if isinstance(s, int) else tuple(s)
+            if key not in decision:
+                decision[key] = self.testSingle(s)
+            result.append(decision[key])
         return result
     
     def output(self, fileName):
         """
-        Outputing the decision tree object into a file
+        Outputing the ada boost object (its weight list) into a model file
         :param fileName: the output file name
         :return: None
         """
-        with open(fileName, "wb") as file:
-            pickle.dump(self, file)
+        if self.trueVote is None:
+            writeModel(fileName, ADABOOST_MODEL, LANGUAGES, [array("d", self.weight)], FEATURE_KEY)
+        else:
+            writeModel(fileName, ADABOOST_MODEL, self.languages,
+                       [array("d", self.weight), self.trueVote, self.falseVote], FEATURE_KEY)
+
+    def table(self, width=FEATURE_COUNT):
+        """
+        Precomputing the prediction of every possible entry
+        :param width: the number of features
+        :return: the :class:`~TablePredictor` of this ada boost
+        """
+        return TablePredictor(self, width)
+
+
+def readAdaBoost(languages, arrays):
+    """
+    Creating an ada boost object from the content of a model file
+    :param languages: the language types of the model
+    :param arrays: the arrays of the model
+    :return: the :class:`~AdaBoost` object
+    """
+    ada = AdaBoost()
+    ada.weight = arrays[0].tolist()
+    if len(arrays) == 3:
+        ada.languages = languages
+        ada.trueVote = arrays[1]
+        ada.falseVote = arrays[2]
+    return ada
 
 
 def main():
@@ -0,0 +1,193 @@
+"""
+file: benchmark.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the benchmark of the training and prediction
+pipeline over the example files. Each stage is timed (best of several runs,
+each calling it until MIN_DURATION) and its peak memory is measured in a
+separate run, then the results can be saved as a baseline and compared with
+a later run (only on the example files of at least MIN_SENTENCES lines).
+
+usage: python benchmark.py [example files] [--repeat N] [--save result.json]
+       [--compare baseline.json]
+"""
+
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from language import *
+
+REPEAT = 3
+# a stage is reported as a regression when it is this much slower than the baseline
+REGRESSION = 1.25
+# a timed run calls the stage until it lasts this many seconds, and the time
+# of one call is compared, so that short stages are not only timer noise
+MIN_DURATION = 0.1
+# a stage is not reported as a regression either unless one call is this many
+# seconds slower than the baseline
+MIN_SLOWDOWN = 0.01
+# the stages of smaller example files are reported but not compared
+MIN_SENTENCES = 1000
+
+
+def measure(function, repeat):
+    """
+    Timing a function and measuring its peak memory
+    :param function: the function (without argument)
+    :param repeat: the number of timed runs
+    :return: the best time of one call in seconds, the peak memory in bytes
+    and the result
+    """
+    best = None
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            result = function()
+            calls += 1
+            duration = time.perf_counter() - start
+            if duration >= MIN_DURATION:
+                break
+        duration /= calls
+        if best is None or duration < best:
+            best = duration
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def stages(fileName, modelFile):
+    """
+    Listing the benchmarked stages of an example file (with language type)
+    :param fileName: the example file
+    :param modelFile: a temporary file name for the models
+    :return: a list of (stage name, function, whether it processes every
+    sentence) in pipeline order
+    """
+    with open(fileName, encoding="utf8") as file:
+        lines = [line.strip() for line in file]
+    entries = [convert(line) for line in lines]
+    trainingSet = packedSample(fileName)
+    dt = DecisionTree(TreeNode(FeatureMatrix(trainingSet)))
+    dt.inducing(dt.root, DT_DEPTH)
+    ada = AdaBoost()
+    ada.training(trainingSet, ada.hypothesis)
+    nb = NaiveBayes()
+    nb.training(iterNgramSample(fileName))
+    dt.output(modelFile)
+    tree = inputfile(modelFile)
+    lazyTree = inputfile(modelFile, lazy=True)
+
+    def induce():
+        induced = DecisionTree(TreeNode(FeatureMatrix(trainingSet)))
+        induced.inducing(induced.root, DT_DEPTH)
+        return induced
+
+    def boost():
+        boost = AdaBoost()
+        boost.training(trainingSet, boost.hypothesis)
+        return boost
+
+    def bayes():
+        bayes = NaiveBayes()
+        bayes.training(iterNgramSample(fileName))
+        return bayes
+
+    return [("tokenize", lambda: [convert(line) for line in lines], True),
+            ("featurize", lambda: [featureMask(entry[1]) for entry in entries], True),
+            ("sample", lambda: packedSample(fileName), True),
+            ("tree", induce, True),
+            ("adaboost", boost, True),
+            ("naive bayes", bayes, True),
+            ("save", lambda: dt.output(modelFile), False),
+            ("load", lambda: inputfile(modelFile), False),
+            ("load mapped", lambda: inputfile(modelFile, mapped=True), False),
+            ("predict tree", lambda: list(predict(tree, fileName)), True),
+            ("predict tree lazy", lambda: list(predict(lazyTree, fileName)), True),
+            ("predict adaboost", lambda: list(predict(ada, fileName)), True),
+            ("predict naive bayes", lambda: list(predict(nb, fileName)), True)]
+
+
+def run(files, repeat):
+    """
+    Running the benchmark
+    :param files: the example files (with language type)
+    :param repeat: the number of timed runs per stage
+    :return: a dictionary of the results, as saved in a baseline file
+    """
+    results = {}
+    modelFile = os.path.join(tempfile.mkdtemp(), "model")
+    for fileName in files:
+        with open(fileName, encoding="utf8") as file:
+            size = sum(1 for _ in file)
+        results[os.path.basename(fileName)] = {}
+        for name, function, counted in stages(fileName, modelFile):
+            seconds, peak, _ = measure(function, repeat)
+            rate = None
+            if counted and seconds > 0:
+                rate = size / seconds
+            results[os.path.basename(fileName)][name] = {
+                "seconds": seconds, "sentences": size, "rate": rate, "peak": peak}
+    os.remove(modelFile)
+    os.rmdir(os.path.dirname(modelFile))
+    return {"python": platform.python_version(), "repeat": repeat, "results": results}
+
+
+def report(benchmark, baseline=None):
+    """
+    Printing the results, with the time ratio to a baseline if given
+    :param benchmark: the results from :func:`~run`
+    :param baseline: previous results from :func:`~run` (or None)
+    :return: the list of (file, stage) slower than the baseline by REGRESSION
+    and MIN_SLOWDOWN, among the files of at least MIN_SENTENCES lines
+    """
+    regressions = []
+    print("%-16s %-18s %10s %14s %12s %8s" % ("file", "stage", "seconds", "sentences/s", "peak KB", "ratio"))
+    for fileName, result in benchmark["results"].items():
+        for stage, x in result.items():
+            ratio = ""
+            if baseline is not None and stage in baseline["results"].get(fileName, {}):
+                old = baseline["results"][fileName][stage]["seconds"]
+                if old > 0:
+                    ratio = "%.2f" % (x["seconds"] / old)
+                    if x["sentences"] >= MIN_SENTENCES and x["seconds"] / old > REGRESSION \
+                            and x["seconds"] - old >= MIN_SLOWDOWN:
+                        regressions.append((fileName, stage))
+                        ratio += " !"
+            rate = "" if x["rate"] is None else "%.0f" % x["rate"]
+            print("%-16s %-18s %10.5f %14s %12.1f %8s" % (fileName, stage, x["seconds"], rate,
+                                                          x["peak"] / 1024, ratio))
+    return regressions
+
+
+def main():
+    repeat = int(option("--repeat", REPEAT))
+    saveFile = option("--save", None)
+    compareFile = option("--compare", None)
+    files = sys.argv[1:]
+    if not files:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        files = sorted(glob.glob(os.path.join(directory, "size_*.dat")), key=os.path.getsize)
+    baseline = None
+    if compareFile is not None:
+        with open(compareFile, encoding="utf8") as file:
+            baseline = json.load(file)
+    benchmark = run(files, repeat)
+    regressions = report(benchmark, baseline)
+    if saveFile is not None:
+        with open(saveFile, "w", encoding="utf8") as file:
+            json.dump(benchmark, file, indent=2)
+    if regressions:
+        print("Slower than the baseline: " + ", ".join(f + " " + s for f, s in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,29 @@ description: this file contains the decision tree and its tree node class.
 It also includes other formatting method for training set or testing set.
 """
 
+import copy
+import hashlib
+import heapq
 import math
-import pickle
 import sys
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice
 from feature import *
+from model import *
+
+# language types with a fixed label index in the packed form
+LANGUAGES = ["en", "nl"]
+# largest number of features of a lookup table (2 ** 20 entries)
+MAX_TABLE_WIDTH = 20
+# min number of entries of a subtree induced by another process
+PARALLEL_SAMPLES = 2000
+# file name suffix of the cached features of an example file
+CACHE_SUFFIX = ".features"
+# bytes of 0/1 values to the digits of a base 2 number
+BINARY_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
 
 def sample(fileName):
     """
@@ -18,34 +37,413 @@ def sample(fileName):
     :return: training set (each entry with boolean value in front and
     language type at the last position)
     """
-    trainingSet = []
+    return list(iterSample(fileName))
+
+
+def testSample(fileName):
+    """
+    Formating the example file (without language type) to testing set
+    :param fileName: example file
+    :return: testing set (each entry with only boolean value)
+    """
+    return list(iterTestSample(fileName))
+
+
+def iterSample(fileName):
+    """
+    Reading the example file (with language type) one entry at a time
+    :param fileName: example file
+    :return: a generator of the entries of :func:`~sample`
+    """
     with open(fileName, encoding="utf8") as file:
         for line in file:
             line = line.strip()
             entry = convert(line)
-            trainingSet.append(recognize(entry))
-    return trainingSet
+            yield recognize(entry)
 
 
-def testSample(fileName):
+def iterTestSample(fileName):
     """
-    Formating the example file (without language type) to testing set
+    Reading the example file (without language type) one entry at a time
     :param fileName: example file
-    :return: testing set (each entry with only boolean value)
+    :return: a generator of the entries of :func:`~testSample`
     """
-    testSet = []
     with open(fileName, encoding="utf8") as file:
         for line in file:
             line = line.strip()
             entry = format(line)
-            testSet.append(findFeature(entry))
+            yield findFeature(entry)
+
+
+def iterTestMask(fileName, extract=None):
+    """
+    Reading the example file (without language type) one feature mask at a time
+    :param fileName: example file
+    :param extract: the function making the entry of a line, if not a feature
+    mask (see :func:`~extractor`)
+    :return: a generator of the entries of :func:`~packedTestSample`
+    """
+    with open(fileName, encoding="utf8") as file:
+        if extract is None:
+            for line in file:
+                yield featureMask(format(line))
+        else:
+            for line in file:
+                yield extract(line)
+
+
+def iterNgramSample(fileName, buckets=NGRAM_BUCKETS):
+    """
+    Reading the example file (with language type) one n-gram vector at a time
+    :param fileName: example file
+    :param buckets: the number of buckets of the vectors
+    :return: a generator of (vector from :func:`~ngramVector`, language type)
+    """
+    with open(fileName, encoding="utf8") as file:
+        for line in file:
+            entry = convert(line.strip())
+            yield ngramVector(entry[1], buckets), entry[0]
+
+
+def lineMask(line):
+    """
+    Making the feature mask of a line of a testing example file
+    :param line: the line (without language type)
+    :return: the feature mask
+    """
+    return featureMask(format(line))
+
+
+def extractor(hypothesis):
+    """
+    Giving the function making the entry tested by a learning object from a
+    line: its extract method if it has one, the feature mask otherwise
+    :param hypothesis: the learning object
+    :return: the function of a line
+    """
+    return getattr(hypothesis, "extract", lineMask)
+
+
+def chunks(entries, size):
+    """
+    Grouping entries into batches, e.g. chunks(iterSample(fileName), 1000)
+    :param entries: any iterable (usually one of the generators above)
+    :param size: the number of entries per batch
+    :return: a generator of lists of size entries (the last one may be shorter)
+    """
+    entries = iter(entries)
+    while True:
+        chunk = list(islice(entries, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def maskArray(width):
+    """
+    Creating an empty array able to hold feature masks of the given width
+    :param width: the number of features
+    :return: an array of the smallest fitting type (a list above 64 features)
+    """
+    for typecode in "BHLQ":
+        if width <= array(typecode).itemsize * 8:
+            return array(typecode)
+    return []
+
+
+class PackedSet:
+    """
+    PackedSet class represents a training set in compact form. Subsets made by
+    :func:`~splitList` are ranges of the same arrays, not copies
+    self.masks: one integer per entry, its bit i is the value of feature i
+    self.labels: the language type of each entry, as index of self.languages
+    self.start, self.end: the range of the arrays belonging to this set
+    self.languages: the language types seen so far ("en" and "nl" first)
+    self.width: the number of features
+    self.rows: the list form of each (mask, label) pair already requested
+    """
+    def __init__(self, width=FEATURE_COUNT):
+        self.masks = maskArray(width)
+        self.labels = array("B")
+        self.start = 0
+        self.end = 0
+        self.languages = list(LANGUAGES)
+        self.width = width
+        self.rows = {}
+
+    def append(self, mask, language):
+        """
+        Adding an entry to the set (only for a set that is not a subset)
+        :param mask: the feature mask of the entry
+        :param language: the language type of the entry
+        :return: None
+        """
+        if language not in self.languages:
+            self.languages.append(language)
+        self.masks.append(mask)
+        self.labels.append(self.languages.index(language))
+        self.end += 1
+
+    def entries(self):
+        """
+        Giving the entries of this set
+        :return: the feature masks and the label indexes (copies of the range)
+        """
+        return self.masks[self.start:self.end], self.labels[self.start:self.end]
+
+    def partition(self, attribute):
+        """
+        Reordering the range in place so that the entries with the attribute
+        (feature) True come first
+        :param attribute: the attribute (feature) value
+        :return: the subsets of entries with the attribute True and False
+        """
+        bit = 1 << attribute
+        masks = self.masks
+        labels = self.labels
+        i = self.start
+        j = self.end - 1
+        while True:
+            while i <= j and masks[i] & bit:
+                i += 1
+            while i <= j and not masks[j] & bit:
+                j -= 1
+            if i >= j:
+                break
+            masks[i], masks[j] = masks[j], masks[i]
+            labels[i], labels[j] = labels[j], labels[i]
+        trueSet = copy.copy(self)
+        trueSet.end = i
+        falseSet = copy.copy(self)
+        falseSet.start = i
+        return trueSet, falseSet
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        """
+        Giving an entry in the list form used by :func:`~sample` (shared
+        between equal entries, so it must not be modified)
+        :param index: the entry index (negative from the end of the set)
+        :return: a list of boolean value with language type at the last position
+        """
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("PackedSet index out of range")
+        key = (self.masks[self.start + index], self.labels[self.start + index])
+        row = self.rows.get(key)
+        if row is None:
+            row = unpack(key[0], self.width)
+            row.append(self.languages[key[1]])
+            self.rows[key] = row
+        return row
+
+
+def packedSample(fileName):
+    """
+    Formatting the example file (with language type) to a packed training set
+    :param fileName: example file
+    :return: a :class:`~PackedSet` of the file
+    """
+    trainingSet = PackedSet()
+    with open(fileName, encoding="utf8") as file:
+        for line in file:
+            entry = convert(line.strip())
+            trainingSet.append(featureMask(entry[1]), entry[0])
+    return trainingSet
+
+
+def fileKey(fileName):
+    """
+    Identifying the content of an example file and the feature definitions
+    :param fileName: example file
+    :return: the bytes of the hash of the file followed by :data:`FEATURE_KEY`
+    """
+    digest = hashlib.sha256()
+    with open(fileName, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest() + FEATURE_KEY
+
+
+def maskBytes(masks, width):
+    """
+    Packing feature masks wider than 64 features (a list from
+    :func:`~maskArray`) into bytes of a fixed length per mask
+    :param masks: the list of feature masks
+    :param width: the number of features
+    :return: an array of bytes
+    """
+    size = (width + 7) // 8
+    return array("B", b"".join([x.to_bytes(size, "little") for x in masks]))
+
+
+def bytesMasks(data, width):
+    """
+    Unpacking the feature masks made by :func:`~maskBytes`
+    :param data: the bytes (or array of bytes)
+    :param width: the number of features
+    :return: the list of feature masks
+    """
+    data = bytes(data)
+    size = (width + 7) // 8
+    return [int.from_bytes(data[i:i + size], "little") for i in range(0, len(data), size)]
+
+
+def cachedSample(fileName):
+    """
+    Formatting the example file (with language type) to a packed training set,
+    reusing the features saved next to the file by a previous call. The saved
+    features are rebuilt when the file or the feature definitions change
+    :param fileName: example file
+    :return: a :class:`~PackedSet` of the file
+    """
+    cacheFile = fileName + CACHE_SUFFIX
+    key = fileKey(fileName)
+    trainingSet = PackedSet()
+    # above 64 features the masks are a list, saved as bytes
+    wide = not isinstance(trainingSet.masks, array)
+    try:
+        kind, languages, arrays, _ = readModel(cacheFile)
+        if kind == FEATURE_SET and len(arrays) == 3 and arrays[0].tobytes() == key:
+            if wide:
+                masks = bytesMasks(arrays[1], trainingSet.width)
+            elif arrays[1].typecode == trainingSet.masks.typecode:
+                masks = arrays[1]
+            else:
+                masks = None
+            if masks is not None and len(masks) == len(arrays[2]):
+                trainingSet.masks = masks
+                trainingSet.labels = arrays[2]
+                trainingSet.end = len(masks)
+                trainingSet.languages = languages
+                return trainingSet
+    except (IOError, ValueError):
+        pass
+    trainingSet = packedSample(fileName)
+    masks = trainingSet.masks
+    if wide:
+        masks = maskBytes(masks, trainingSet.width)
+    try:
+        writeModel(cacheFile, FEATURE_SET, trainingSet.languages, [array("B", key), masks, trainingSet.labels])
+    except IOError:
+        # the features are only not cached (e.g. read-only directory)
+        pass
+    return trainingSet
+
+
+def packedTestSample(fileName):
+    """
+    Formatting the example file (without language type) to a packed testing set
+    :param fileName: example file
+    :return: an array of the feature mask of each entry
+    """
+    testSet = maskArray(FEATURE_COUNT)
+    testSet.extend(iterTestMask(fileName))
     return testSet
 
 
+def bitColumn(values):
+    """
+    Packing a sequence of boolean into one integer
+    :param values: the boolean value of each entry
+    :return: an integer whose bit j is the value of entry j
+    """
+    digits = bytes(values)[::-1].translate(BINARY_DIGITS)
+    if not digits:
+        return 0
+    return int(digits, 2)
+
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(x):
+        """
+        Counting the set bits of an integer (int.bit_count before python 3.10)
+        """
+        return bin(x).count("1")
+
+
+class FeatureMatrix:
+    """
+    FeatureMatrix class represents a training set as a boolean matrix stored
+    column by column, so that a feature is counted over every entry at once
+    self.columns: one integer per feature, its bit j is the value for entry j
+    self.classes: one integer per language type, its bit j is set if entry j
+    has that language type
+    self.rows: the selected entries (bit j set if entry j belongs to the set),
+    or None for a compact selection (see :meth:`~FeatureMatrix.compact`)
+    self.base: the rows of the whole matrix, shared by all its selections
+    self.path: the (attribute, value) pairs selected since self.base
+    self.languages: the language types (same as the source :class:`~PackedSet`)
+    self.width: the number of features
+    """
+    def __init__(self, packed):
+        masks, labels = packed.entries()
+        self.columns = [bitColumn(m >> i & 1 for m in masks) for i in range(packed.width)]
+        self.classes = [bitColumn(l == c for l in labels) for c in range(len(packed.languages))]
+        self.rows = (1 << len(packed)) - 1
+        self.base = self.rows
+        self.path = ()
+        self.languages = packed.languages
+        self.width = packed.width
+
+    def select(self, attribute, value):
+        """
+        Selecting the entries with the given value at specific attribute,
+        sharing the columns with this matrix
+        :param attribute: the attribute (feature) value
+        :param value: True or False
+        :return: the sub matrix
+        """
+        rows = self.expand().rows
+        result = copy.copy(self)
+        if value:
+            result.rows = rows & self.columns[attribute]
+        else:
+            result.rows = rows & ~self.columns[attribute]
+        result.path = self.path + ((attribute, value),)
+        return result
+
+    def compact(self):
+        """
+        Dropping the rows of a selection waiting to be split, which are as
+        large as the whole matrix whatever the size of the selection, keeping
+        only its path from self.base
+        :return: the compact selection
+        """
+        result = copy.copy(self)
+        result.rows = None
+        return result
+
+    def expand(self):
+        """
+        Restoring the rows of a compact selection from its path
+        :return: the selection with its rows (this matrix if it has them)
+        """
+        if self.rows is not None:
+            return self
+        rows = self.base
+        for attribute, value in self.path:
+            if value:
+                rows &= self.columns[attribute]
+            else:
+                rows &= ~self.columns[attribute]
+        result = copy.copy(self)
+        result.rows = rows
+        return result
+
+    def __len__(self):
+        return popcount(self.expand().rows)
+
+
 def entropy(x):
     """
     Calculating the entropy value of a given possibility
-    :param x: possibility input
+    :param x: possibility input (of one of two language types)
     :return: entropy value
     """
     if x == 0 or x == 1:
@@ -54,51 +452,144 @@ def entropy(x):
         return -(x * math.log(x, 2) + (1 - x) * math.log((1 - x), 2))
 
 
+def classEntropy(counts):
+    """
+    Calculating the entropy value of the language types of a set
+    :param counts: the number of entries of each language type
+    :return: entropy value
+    """
+    n = sum(counts)
+    if n == 0:
+        return 0
+    if len(counts) == 2:
+        return entropy(counts[0] / n)
+    result = 0
+    for x in counts:
+        if x != 0:
+            result -= x / n * math.log(x / n, 2)
+    return result
+
+
+def summarize(true, false, total):
+    """
+    Calculating the remainder of a feature from its counts
+    :param true: number of entries of each language type where the feature is True
+    :param false: number of entries of each language type where the feature is False
+    :param total: number of entries in the training set
+    :return: a dictionary of the counts and the remainder
+    """
+    return {"true": true, "false": false,
+            "remainder": classEntropy(true) * sum(true) / total + classEntropy(false) * sum(false) / total}
+
+
+def majority(counts):
+    """
+    Finding the most frequent language type (the first one on a tie)
+    :param counts: the number of entries of each language type
+    :return: the index of the language type
+    """
+    return max(range(len(counts)), key=counts.__getitem__)
+
+
+def listLanguages(list):
+    """
+    Listing the language types of a training set in list form
+    :param list: the training set
+    :return: the language types ("en" and "nl" first)
+    """
+    languages = [x for x in LANGUAGES]
+    for x in list:
+        if x[-1] not in languages:
+            languages.append(x[-1])
+    return languages
+
+
 def findAttribute(list):
     """
     Summarizing each possible feature from a given training set
-    :param list: the specific training set
+    :param list: the specific training set (a list, a :class:`~PackedSet`
+    or a :class:`~FeatureMatrix`)
     :return: a dictionary of {each feature: result and remainder}
     """
+    if isinstance(list, FeatureMatrix):
+        return findMatrixAttribute(list)
+    if isinstance(list, PackedSet):
+        return findPackedAttribute(list)
     attribute_remainder = {}
     attribute = len(list[0]) - 1
     total = len(list)
+    languages = listLanguages(list)
     for i in range(attribute):
-        trueEN = 0
-        trueNL = 0
-        falseEN = 0
-        falseNL = 0
+        true = [0] * len(languages)
+        false = [0] * len(languages)
         for j in range(total):
-            if list[j][i] is True and list[j][-1] == "en":
-                trueEN += 1
-            elif list[j][i] is True and list[j][-1] == "nl":
-                trueNL += 1
-            elif list[j][i] is False and list[j][-1] == "en":
-                falseEN += 1
-            elif list[j][i] is False and list[j][-1] == "nl":
-                falseNL += 1
-        if trueEN + trueNL != 0:
-            pTure = trueEN / (trueEN + trueNL)
-        else:
-            pTure = 0
-        if falseEN + falseNL != 0:
-            pFalse = falseEN / (falseEN + falseNL)
-        else:
-            pFalse = 0
-        attribute_remainder[i] = {"trueEN": trueEN, "trueNL": trueNL,
-                                  "falseEN": falseEN, "falseNL": falseNL,
-                                  "remainder": entropy(pTure) * (trueEN + trueNL) / total + entropy(pFalse) * (falseEN + falseNL) / total}
+            if list[j][i] is True:
+                true[languages.index(list[j][-1])] += 1
+            elif list[j][i] is False:
+                false[languages.index(list[j][-1])] += 1
+        attribute_remainder[i] = summarize(true, false, total)
+    return attribute_remainder
+
+
+def findPackedAttribute(packed):
+    """
+    Summarizing each possible feature from a packed training set, counting
+    every distinct (mask, label) pair once
+    :param packed: the specific :class:`~PackedSet`
+    :return: a dictionary of {each feature: result and remainder}
+    """
+    attribute_remainder = {}
+    counts = Counter(zip(*packed.entries()))
+    total = len(packed)
+    for i in range(packed.width):
+        bit = 1 << i
+        count = [[0] * len(packed.languages), [0] * len(packed.languages)]
+        for (mask, label), n in counts.items():
+            count[mask & bit == 0][label] += n
+        attribute_remainder[i] = summarize(count[0], count[1], total)
+    return attribute_remainder
+
+
+def findMatrixAttribute(matrix):
+    """
+    Summarizing each possible feature from a training set matrix, using a few
+    integer operations per feature and language type instead of a loop over
+    the entries
+    :param matrix: the specific :class:`~FeatureMatrix`
+    :return: a dictionary of {each feature: result and remainder}
+    """
+    attribute_remainder = {}
+    rows = matrix.rows
+    classes = [rows & x for x in matrix.classes]
+    total = popcount(rows)
+    totals = [popcount(x) for x in classes]
+    for i in range(matrix.width):
+        column = matrix.columns[i]
+        true = [popcount(x & column) for x in classes]
+        false = [totals[c] - true[c] for c in range(len(classes))]
+        attribute_remainder[i] = summarize(true, false, total)
     return attribute_remainder
 
 
 def splitList(list, attribute, value):
     """
-    Sublisting the training set by the given value at specific attribute (feature)
-    :param list: the original training set
+    Sublisting the training set by the given value at specific attribute (feature).
+    Caution: a :class:`~PackedSet` is not copied but reordered in place by
+    :meth:`~PackedSet.partition` (use it directly to get both sub sets at once)
+    :param list: the original training set (a list, a :class:`~PackedSet`
+    or a :class:`~FeatureMatrix`)
     :param attribute: the attribute (feature) value
     :param value: the language type
-    :return: the sub training set
+    :return: the sub training set (a range of the reordered arrays for a
+    :class:`~PackedSet`)
     """
+    if isinstance(list, FeatureMatrix):
+        return list.select(attribute, value)
+    if isinstance(list, PackedSet):
+        trueSet, falseSet = list.partition(attribute)
+        if value:
+            return trueSet
+        return falseSet
     split = []
     for x in list:
         if x[attribute] == value:
@@ -113,7 +604,7 @@ def leastRemainder(data):
     :return: the attribute (feature) value with the least remainder. If the
     current node cannot be further determined, this function return -1.
     """
-    smallest = 1
+    smallest = math.inf
     attribute = 0
     for i in data:
         temp = data[i]["remainder"]
@@ -130,20 +621,33 @@ def leastRemainder(data):
 class TreeNode:
     """
     TreeNode class represents each step of a decision tree
-    self.info: the specific training set
+    self.info: the specific training set (released once the node is induced)
     self.stop: if the node is at bottom of the decision tree (leaf node)
     self.decision: the prediction given at this node
     self.hypothesis: a list of all pairs of (checked feature value, T/F)
+    self.size: the number of entries of the training set
+    self.gain: the information gain of splitting at self.nextFeature
+    self.languages: the language types of the counts in self.features
     """
     def __init__(self, list):
         self.info = list
+        self.size = len(list)
         self.features = findAttribute(list)
         self.nextFeature = leastRemainder(self.features) # = -1
+        if isinstance(list, (PackedSet, FeatureMatrix)):
+            self.languages = list.languages
+        else:
+            self.languages = listLanguages(list)
+        x = self.features[max(self.nextFeature, 0)]
+        counts = [x["true"][c] + x["false"][c] for c in range(len(x["true"]))]
+        self.gain = 0
+        if self.nextFeature != -1 and sum(counts) != 0:
+            self.gain = classEntropy(counts) * sum(counts) / self.size - x["remainder"]
         self.trueBranch = None
         self.falseBranch = None
         self.parent = None
-        self.stop = False
-        self.decision = "en"
+        self.stop = self.nextFeature == -1
+        self.decision = self.languages[majority(counts)]
         self.hypothesis = []
         # self.setNextFeature()
 
@@ -158,10 +662,7 @@ class TreeNode:
         for p in node.parent.hypothesis:
             node.hypothesis.append(p)
         node.hypothesis.append((self.nextFeature, True))
-        if self.features[self.nextFeature]["trueEN"] >= self.features[self.nextFeature]["trueNL"]:
-            node.decision = "en"
-        else:
-            node.decision = "nl"
+        node.decision = self.languages[majority(self.features[self.nextFeature]["true"])]
 
     def setFalse(self, node):
         """
@@ -174,10 +675,7 @@ class TreeNode:
         for p in node.parent.hypothesis:
             node.hypothesis.append(p)
         node.hypothesis.append((self.nextFeature, False))
-        if self.features[self.nextFeature]["falseEN"] >= self.features[self.nextFeature]["falseNL"]:
-            node.decision = "en"
-        else:
-            node.decision = "nl"
+        node.decision = self.languages[majority(self.features[self.nextFeature]["false"])]
 
     def __repr__(self):
         return "Decision list:\n" + str(self.hypothesis) + "\nDecision: " + self.decision
@@ -191,32 +689,157 @@ class DecisionTree:
         self.root = node
         self.leaves = []
 
-    def inducing(self, node, depth=10):
+    def inducing(self, node, depth=10, minSamples=1, minGain=0, maxLeaves=None, order="depth", workers=1,
+                 parallelSamples=PARALLEL_SAMPLES):
         """
-        Inducing the decision tree from a sepcific node if possible
+        Inducing the decision tree from a sepcific node if possible, taking the
+        nodes to split from a queue instead of recursing. Every induced node
+        releases its training set, so only the structure is kept
         :param node: the start node
         :param depth: the max depth of the inducing can reach (default as 10)
+        :param minSamples: the min number of entries of each child of a split
+        :param minGain: the min information gain of a split
+        :param maxLeaves: the max number of leaf nodes (None for no limit)
+        :param order: the order of splitting nodes: "depth" (depth first),
+        "breadth" (breadth first) or "best" (largest information gain first),
+        which decides the kept splits when maxLeaves is reached
+        :param workers: the number of processes inducing independent subtrees
+        (only without maxLeaves, which depends on the whole tree)
+        :param parallelSamples: the min number of entries of a subtree induced
+        by another process
         :return: None
         """
-        if not node.stop:
-            left = TreeNode(splitList(node.info, node.nextFeature, True))
-            if node.features[node.nextFeature]["trueEN"] == 0 or \
-                    node.features[node.nextFeature]["trueNL"] == 0:
-                left.stop = True
-            node.setTrue(left)
-            if len(left.hypothesis) >= depth or left.features[node.nextFeature]["remainder"] == 1 or left.nextFeature == -1:
-                left.stop = True
-
-            right = TreeNode(splitList(node.info, node.nextFeature, False))
-            if node.features[node.nextFeature]["falseEN"] == 0 or \
-                    node.features[node.nextFeature]["falseNL"] == 0:
-                right.stop = True
-            node.setFalse(right)
-            if len(right.hypothesis) >= depth or right.features[node.nextFeature]["remainder"] == 1 or right.nextFeature == -1:
-                right.stop = True
-
-            self.inducing(left)
-            self.inducing(right)
+        if order == "depth":
+            pending = [node]
+            take = pending.pop
+            put = pending.append
+        elif order == "breadth":
+            pending = deque([node])
+            take = pending.popleft
+            put = pending.append
+        elif order == "best":
+            sequence = count()
+            pending = [(-node.gain, next(sequence), node)]
+            take = lambda: heapq.heappop(pending)[2]
+            put = lambda x: heapq.heappush(pending, (-x.gain, next(sequence), x))
+        else:
+            raise ValueError("invalid inducing order. (must be 'depth', 'breadth' or 'best')")
+        if workers > 1 and maxLeaves is None:
+            self.parallelInducing(node, depth, minSamples, minGain, order, workers, parallelSamples)
+            return
+        leaves = 1
+        while pending:
+            node = take()
+            if maxLeaves is not None and leaves >= maxLeaves:
+                node.info = None
+                node.stop = True
+                continue
+            children = self.splitting(node, depth, minSamples, minGain)
+            if children:
+                leaves += 1
+            for x in children:
+                put(x)
+
+    def splitting(self, node, depth, minSamples, minGain):
+        """
+        Splitting a node into its two children if the limits allow it, and
+        releasing its training set
+        :param node: the node to split
+        :param depth: the max depth of the inducing can reach
+        :param minSamples: the min number of entries of each child
+        :param minGain: the min information gain of the split
+        :return: the list of (right, left) children, empty if not split
+        """
+        info = node.info
+        node.info = None
+        if node.stop:
+            return []
+        if isinstance(info, FeatureMatrix):
+            info = info.expand()
+        if len(node.hypothesis) >= depth or (minGain > 0 and node.gain < minGain):
+            node.stop = True
+            return []
+        if isinstance(info, PackedSet):
+            trueSet, falseSet = info.partition(node.nextFeature)
+        else:
+            trueSet = splitList(info, node.nextFeature, True)
+            falseSet = splitList(info, node.nextFeature, False)
+        if len(trueSet) < minSamples or len(falseSet) < minSamples:
+            node.stop = True
+            return []
+
+        left = TreeNode(trueSet)
+        if node.features[node.nextFeature]["true"].count(0) >= len(node.languages) - 1:
+            left.stop = True
+        node.setTrue(left)
+        if len(left.hypothesis) >= depth or left.features[node.nextFeature]["remainder"] == 1 or left.nextFeature == -1:
+            left.stop = True
+
+        right = TreeNode(falseSet)
+        if node.features[node.nextFeature]["false"].count(0) >= len(node.languages) - 1:
+            right.stop = True
+        node.setFalse(right)
+        if len(right.hypothesis) >= depth or right.features[node.nextFeature]["remainder"] == 1 or right.nextFeature == -1:
+            right.stop = True
+        if isinstance(info, FeatureMatrix):
+            # pending nodes keep their path only: a breadth or best order
+            # frontier may hold 2 ** depth of them
+            left.info = left.info.compact()
+            right.info = right.info.compact()
+        return [right, left]
+
+    def parallelInducing(self, node, depth, minSamples, minGain, order, workers, parallelSamples):
+        """
+        Inducing the decision tree with several processes. The largest nodes
+        are split here until there are enough independent subtrees of at least
+        parallelSamples entries, which are then induced by the worker processes
+        while the smaller ones are induced here, and merged back into the tree
+        :param node: the start node
+        :param depth: the max depth of the inducing can reach
+        :param minSamples: the min number of entries of each child of a split
+        :param minGain: the min information gain of a split
+        :param order: the order of splitting nodes in each subtree
+        :param workers: the number of processes
+        :param parallelSamples: the min number of entries of a subtree induced
+        by another process
+        :return: None
+        """
+        frontier = [node]
+        large = [node] if node.size >= parallelSamples else []
+        while large and len(large) < workers:
+            x = max(large, key=lambda x: x.size)
+            frontier.remove(x)
+            frontier.extend(self.splitting(x, depth, minSamples, minGain))
+            large = [x for x in frontier if not x.stop and x.size >= parallelSamples and x.parent is not None]
+        if not large:
+            for x in frontier:
+                self.inducing(x, depth, minSamples, minGain, None, order)
+            return
+        matrix = None
+        if large and isinstance(large[0].info, FeatureMatrix):
+            # the columns are sent once to each process, then only the selected rows
+            matrix = large[0].info
+        with ProcessPoolExecutor(workers, initializer=startInducer, initargs=(matrix,)) as executor:
+            tasks = []
+            for x in large:
+                info = x.info
+                parent = x.parent
+                x.info = None
+                x.parent = None
+                if matrix is not None:
+                    info = info.expand().rows
+                tasks.append((x, parent, executor.submit(induceSubtree, x, info, depth, minSamples, minGain, order)))
+                x.parent = parent
+            for x in frontier:
+                if x not in large:
+                    self.inducing(x, depth, minSamples, minGain, None, order)
+            for x, parent, task in tasks:
+                subtree = task.result()
+                subtree.parent = parent
+                if parent.trueBranch is x:
+                    parent.trueBranch = subtree
+                else:
+                    parent.falseBranch = subtree
 
     def getLeaf(self, node):
         """
@@ -224,20 +847,30 @@ class DecisionTree:
         :param node: the start node
         :return: None
         """
-        if not node is None:
-            if node.stop:
-                self.leaves.append(node)
-            else:
-                self.getLeaf(node.trueBranch)
-                self.getLeaf(node.falseBranch)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if not node is None:
+                if node.stop:
+                    self.leaves.append(node)
+                else:
+                    stack.append(node.falseBranch)
+                    stack.append(node.trueBranch)
 
     def testSingle(self, test):
         """
         Testing a single entry, find the corresponding language type prediction
-        :param test: a single list with only boolean value
+        :param test: a single list with only boolean value, or a feature mask
         :return: the language type
         """
         temp = self.root
+        if isinstance(test, int):
+            while not temp.stop:
+                if test >> temp.nextFeature & 1:
+                    temp = temp.trueBranch
+                else:
+                    temp = temp.falseBranch
+            return temp.decision
         while True:
             if temp.stop:
                 break
@@ -260,12 +893,240 @@ class DecisionTree:
 
     def output(self, fileName):
         """
-        Outputing the decision tree object into a file
+        Outputing the decision tree object into a model file (as its
+        :class:`~CompiledTree`, the only part needed for prediction)
         :param fileName: the output file name
         :return: None
         """
-        with open(fileName, "wb") as file:
-            pickle.dump(self, file)
+        self.compile().output(fileName)
+
+    def compile(self):
+        """
+        Flattening the tree into arrays for prediction
+        :return: the :class:`~CompiledTree` of this tree
+        """
+        return CompiledTree(self)
+
+    def table(self, width=FEATURE_COUNT):
+        """
+        Precomputing the prediction of every possible entry
+        :param width: the number of features
+        :return: the :class:`~TablePredictor` of this tree
+        """
+        return TablePredictor(self, width)
+
+
+def startInducer(matrix):
+    """
+    Keeping the training set matrix once in each inducing process
+    :param matrix: the :class:`~FeatureMatrix` of the training set (or None)
+    :return: None
+    """
+    global inducerMatrix
+    inducerMatrix = matrix
+
+
+def induceSubtree(node, info, depth, minSamples, minGain, order):
+    """
+    Inducing a subtree in an inducing process
+    :param node: the root node of the subtree (without parent)
+    :param info: its training set, or its selected rows of the matrix
+    :param depth: the max depth of the inducing can reach
+    :param minSamples: the min number of entries of each child of a split
+    :param minGain: the min information gain of a split
+    :param order: the order of splitting nodes
+    :return: the induced node
+    """
+    if inducerMatrix is not None:
+        rows = info
+        info = copy.copy(inducerMatrix)
+        info.rows = rows
+        info.base = rows
+        info.path = ()
+    node.info = info
+    DecisionTree(node).inducing(node, depth, minSamples, minGain, None, order)
+    return node
+
+
+class CompiledTree:
+    """
+    CompiledTree class represents a trained decision tree as parallel arrays
+    indexed by node number, the root being node 0
+    self.feature: the feature checked at each node (-1 at a leaf node)
+    self.trueChild: the node number of the true branch (left child)
+    self.falseChild: the node number of the false branch (right child)
+    self.decision: the language type at each node, as index of self.languages
+    self.languages: the language types of the decisions
+    self.lazy: whether the features of a tested line are only evaluated when
+    a split on the path needs them (see :class:`~LazyFeatures`)
+    """
+    def __init__(self, tree=None):
+        self.feature = array("i")
+        self.trueChild = array("i")
+        self.falseChild = array("i")
+        self.decision = array("B")
+        self.languages = list(LANGUAGES)
+        self.lazy = False
+        if tree is None:
+            return
+        stack = [(tree.root, -1, False)]
+        while stack:
+            node, parent, branch = stack.pop()
+            index = len(self.feature)
+            if parent >= 0:
+                if branch:
+                    self.trueChild[parent] = index
+                else:
+                    self.falseChild[parent] = index
+            if node.decision not in self.languages:
+                self.languages.append(node.decision)
+            self.decision.append(self.languages.index(node.decision))
+            self.trueChild.append(-1)
+            self.falseChild.append(-1)
+            if node.stop:
+                self.feature.append(-1)
+            else:
+                self.feature.append(node.nextFeature)
+                stack.append((node.falseBranch, index, False))
+                stack.append((node.trueBranch, index, True))
+
+    def testSingle(self, test):
+        """
+        Testing a single entry, find the corresponding language type prediction
+        :param test: a single list with only boolean value, or a feature mask
+        :return: the language type
+        """
+        feature = self.feature
+        node = 0
+        if isinstance(test, int):
+            while feature[node] >= 0:
+                if test >> feature[node] & 1:
+                    node = self.trueChild[node]
+                else:
+                    node = self.falseChild[node]
+        else:
+            while feature[node] >= 0:
+                if test[feature[node]]:
+                    node = self.trueChild[node]
+                else:
+                    node = self.falseChild[node]
+        return self.languages[self.decision[node]]
+
+    def extract(self, line):
+        """
+        Making the tested entry of a line of a testing example file
+        :param line: the line (without language type)
+        :return: the feature mask, or the :class:`~LazyFeatures` if self.lazy
+        """
+        if self.lazy:
+            return LazyFeatures(format(line))
+        return featureMask(format(line))
+
+    def testAll(self, list):
+        """
+        Testing all entries from a testing set
+        :param list: the testing set
+        :return: a list of all prediction
+        """
+        result = []
+        for s in list:
+            result.append(self.testSingle(s))
+        return result
+
+    def output(self, fileName):
+        """
+        Outputing the compiled tree object into a model file
+        :param fileName: the output file name
+        :return: None
+        """
+        writeModel(fileName, TREE_MODEL, self.languages,
+                   [self.feature, self.trueChild, self.falseChild, self.decision], FEATURE_KEY)
+
+    def table(self, width=FEATURE_COUNT):
+        """
+        Precomputing the prediction of every possible entry
+        :param width: the number of features
+        :return: the :class:`~TablePredictor` of this tree
+        """
+        return TablePredictor(self, width)
+
+
+class TablePredictor:
+    """
+    TablePredictor class represents a learning object by its prediction for
+    each of the 2 ** width possible feature masks
+    self.table: the language type of each mask, as index of self.languages
+    self.languages: the language types of the table
+    self.width: the number of features
+    """
+    def __init__(self, hypothesis=None, width=FEATURE_COUNT):
+        if width > MAX_TABLE_WIDTH:
+            raise ValueError("too many features for a lookup table (max " + str(MAX_TABLE_WIDTH) + ")")
+        self.table = array("B")
+        self.languages = list(LANGUAGES)
+        self.width = width
+        if hypothesis is None:
+            return
+        for mask in range(1 << width):
+            decision = hypothesis.testSingle(unpack(mask, width))
+            if decision not in self.languages:
+                self.languages.append(decision)
+            self.table.append(self.languages.index(decision))
+
+    def testSingle(self, test):
+        """
+        Testing a single entry, find the corresponding language type prediction
+        :param test: a single list with only boolean value, or a feature mask
+        :return: the language type
+        """
+        if not isinstance(test, int):
+            test = pack(test)
+        return self.languages[self.table[test]]
+
+    def testAll(self, list):
+        """
+        Testing all entries from a testing set
+        :param list: the testing set
+        :return: a list of all prediction
+        """
+        result = []
+        for s in list:
+            result.append(self.testSingle(s))
+        return result
+
+    def output(self, fileName):
+        """
+        Outputing the lookup table object into a model file
+        :param fileName: the output file name
+        :return: None
+        """
+        writeModel(fileName, TABLE_MODEL, self.languages, [self.table], FEATURE_KEY)
+
+
+def readTree(languages, arrays):
+    """
+    Creating a compiled tree from the content of a model file
+    :param languages: the language types of the model
+    :param arrays: the arrays of the model
+    :return: the :class:`~CompiledTree`
+    """
+    tree = CompiledTree()
+    tree.languages = languages
+    tree.feature, tree.trueChild, tree.falseChild, tree.decision = arrays
+    return tree
+
+
+def readTable(languages, arrays):
+    """
+    Creating a lookup table from the content of a model file
+    :param languages: the language types of the model
+    :param arrays: the arrays of the model
+    :return: the :class:`~TablePredictor`
+    """
+    table = TablePredictor(None, len(arrays[0]).bit_length() - 1)
+    table.languages = languages
+    table.table = arrays[0]
+    return table
 
 
 def main():
@@ -6,20 +6,46 @@ description: This file contains all decision features of whether a sentence
 (converted into a list of single words) is Dutch (True) or English (False)
 """
 
+import hashlib
+import re
+import zlib
+from collections import Counter, deque
+
+# characters that are neither a letter nor the word separator (\w also keeps
+# the non-decimal numerals such as "²", which tokenize() drops afterwards)
+NON_LETTER = re.compile(r"[^\w ]|[\d_]")
+# the same characters within ASCII, for bytes.translate()
+NON_LETTER_ASCII = bytes(c for c in range(128) if not chr(c).isalpha() and c != 32)
+# number of buckets of the hashed character n-grams and their lengths
+NGRAM_BUCKETS = 1 << 18
+NGRAM_SIZES = range(1, 5)
+
+
+def tokenize(text):
+    """
+    Lowercasing a text and splitting it into words made of letters only
+    :param text: the text (without language type)
+    :return: a list of words, split at every single space
+    """
+    text = text.lower()
+    if text.isascii():
+        return text.encode().translate(None, NON_LETTER_ASCII).decode().split(" ")
+    words = NON_LETTER.sub("", text).split(" ")
+    for i in range(len(words)):
+        if not words[i].isalpha():
+            words[i] = "".join(filter(str.isalpha, words[i]))
+    return words
+
+
 def convert(sentence):
     """
     Formatting a sentence to a list of words only (for training set)
     """
     trainingSet = []
     try:
-        sentence = sentence.lower()
         temp = sentence.split("|")
-        result = temp[0]
-        words = temp[1].split(" ")
-        for i in range(len(words)):
-            for letter in words[i]:
-                if not letter.isalpha():
-                    words[i] = words[i].replace(letter, "")
+        result = temp[0].lower()
+        words = tokenize(temp[1])
         trainingSet.append(result)
         trainingSet.append(words)
     except:
@@ -27,107 +53,256 @@ def convert(sentence):
     return trainingSet
 
 
-def has_een(list):
-    # = a/an
-    if "een" in list:
-        return True
-    else:
-        return False
-
-
-def has_de(list):
-    # = the
-    if "de" in list:
-        return True
-    else:
-        return False
-
-
-def has_bij(list):
-    # = with/at
-    if "bij" in list:
-        return True
-    else:
-        return False
+# marker words of the multi-word features
+CONJ = ["maar", "en", "als", "dan"]
+IJ = ["ik", "jij", "u", "gij", "hij", "zij", "wij", "het"]
+ADVERB = ["this", "that", "there", "which", "where", "who", "whose", "when"]
+PREP = ["in", "on", "at", "to", "for", "by", "of", "with", "and", "or"] # "in" in both lang
+PRON = ["i", "you", "he", "she", "it", "we", "they", "him", "her", "us", "them", "the", "a", "an"]
+BE = ["am", "is", "are", "was", "were", "being", "been", "be"]
 
 
-def has_van(list):
-    # = from
-    if "van" in list:
-        return True
-    else:
-        return False
+class Feature:
+    """
+    Feature class represents a declared feature of a word list, True or False
+    depending on whether one of its marker words is in the list
+    self.name: the feature name
+    self.words: the marker words (or marker phrases of several words, found
+    when their words follow each other in the list)
+    self.found: the feature value when one of the marker words is found (the
+    opposite value when none is)
+    self.vote: the language type suggested by the feature value True
+    """
+    def __init__(self, name, words, found=True, vote="nl"):
+        self.name = name
+        self.words = words
+        self.found = found
+        self.vote = vote
+
+    def test(self, list):
+        """
+        Evaluating this feature alone (:func:`~featureMask` evaluates all of them)
+        :param list: single word list
+        :return: the feature value
+        """
+        list = [x for x in list if x]
+        for x in self.words:
+            words = markerWords(x)
+            if len(words) == 1 and words[0] in list:
+                return self.found
+            if len(words) > 1:
+                for i in range(len(list) - len(words) + 1):
+                    if list[i:i + len(words)] == words:
+                        return self.found
+        return not self.found
+
+    def __repr__(self):
+        return "Feature(" + repr(self.name) + ", " + repr(self.words) + ", " + repr(self.found) + ", " + \
+               repr(self.vote) + ")"
+
+
+# the feature registry: adding a feature is adding its declaration, the
+# feature masks and the ada boost hypotheses are built from this list
+FEATURES = [Feature("een", ["een"]),      # = a/an
+            Feature("de", ["de"]),        # = the
+            Feature("bij", ["bij"]),      # = with/at
+            Feature("van", ["van"]),      # = from
+            Feature("conj", CONJ),        # = conjunctions
+            Feature("ij", IJ),            # = Personal pronouns
+            Feature("adverb", ADVERB, found=False),
+            Feature("prep", PREP, found=False),
+            Feature("pron", PRON, found=False),
+            Feature("be", BE, found=False)]
+FEATURE_COUNT = len(FEATURES)
+
+
+def markerWords(marker):
+    """
+    Splitting a marker into words the same way as the sentences
+    :param marker: a marker word or phrase
+    :return: the list of its words
+    """
+    return [x for x in tokenize(marker) if x]
 
 
-def has_conj(list):
-    # = conjunctions
-    conj = ["maar", "en", "als", "dan"]
-    for x in conj:
-        if x in list:
-            return True
-    return False
+def buildTable(features):
+    """
+    Building the word to feature bit table used by :func:`~featureMask` (the
+    marker phrases are left to :func:`~buildMatcher`)
+    :param features: a list of :class:`~Feature`
+    :return: a dictionary of {word: bits of the features it belongs to} and the
+    bits of the features that are True when none of their words is found
+    """
+    table = {}
+    absent = 0
+    for i in range(len(features)):
+        for marker in features[i].words:
+            words = markerWords(marker)
+            if len(words) == 1:
+                table[words[0]] = table.get(words[0], 0) | 1 << i
+        if not features[i].found:
+            absent |= 1 << i
+    return table, absent
+
+
+def buildMatcher(features):
+    """
+    Building the word level Aho-Corasick automaton of the marker phrases, which
+    finds all of them in one pass over a word list, however many there are
+    :param features: a list of :class:`~Feature`
+    :return: the transitions of each state ({word: next state}), the state
+    reached by each state on a failed transition and the feature bits of the
+    phrases ending at each state, or None when no feature has a marker phrase
+    """
+    goto = [{}]
+    fail = [0]
+    bits = [0]
+    for i in range(len(features)):
+        for marker in features[i].words:
+            words = markerWords(marker)
+            if len(words) < 2:
+                continue
+            state = 0
+            for word in words:
+                if word not in goto[state]:
+                    goto[state][word] = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    bits.append(0)
+                state = goto[state][word]
+            bits[state] |= 1 << i
+    if len(goto) == 1:
+        return None
+    pending = deque(goto[0].values())
+    while pending:
+        state = pending.popleft()
+        for word, next in goto[state].items():
+            pending.append(next)
+            x = fail[state]
+            while x and word not in goto[x]:
+                x = fail[x]
+            fail[next] = goto[x].get(word, 0)
+            bits[next] |= bits[fail[next]]
+    return goto, fail, bits
+
+
+def matchPhrases(list, matcher):
+    """
+    Finding every marker phrase of a word list in one pass
+    :param list: single word list
+    :param matcher: the automaton from :func:`~buildMatcher`
+    :return: the bits of the features whose marker phrase is found
+    """
+    goto, fail, bits = matcher
+    found = 0
+    state = 0
+    for word in list:
+        if not word:
+            continue
+        while state and word not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(word, 0)
+        found |= bits[state]
+    return found
+
+
+WORD_BITS, ABSENT_BITS = buildTable(FEATURES)
+PHRASE_MATCHER = buildMatcher(FEATURES)
+# the marker words and the marker phrase automaton of each feature alone
+FEATURE_WORDS = [frozenset(buildTable([x])[0]) for x in FEATURES]
+FEATURE_PHRASES = [buildMatcher([x]) for x in FEATURES]
+# to be increased when the tokenizing or the feature masks change in another
+# way than FEATURES, so that the cached features of every file are rebuilt
+FEATURE_VERSION = 1
+FEATURE_KEY = hashlib.sha256(repr((FEATURE_VERSION, [(x.words, x.found) for x in FEATURES])).encode("utf8")).digest()
+
+
+def featureMask(list):
+    """
+    Recognizing every feature in a single pass over the word list (and one
+    more for the marker phrases, if any)
+    :param list: single word list
+    :return: an integer whose bit i is the value of feature i
+    """
+    found = 0
+    for word in WORD_BITS.keys() & list:
+        found |= WORD_BITS[word]
+    if PHRASE_MATCHER is not None:
+        found |= matchPhrases(list, PHRASE_MATCHER)
+    return found ^ ABSENT_BITS
 
 
-def has_ij(list):
-    # = Personal pronouns
-    ij = ["ik", "jij", "u", "gij", "hij", "zij", "wij", "het"]
-    for x in ij:
-        if x in list:
-            return True
-    return False
+class LazyFeatures:
+    """
+    LazyFeatures class represents the features of a word list in the list form
+    of :func:`~findFeature`, each one evaluated only when it is read (e.g. by
+    the splits on the path of a decision tree) instead of all of them at once
+    self.list: the word list
+    self.words: the set of its words
+    """
+    def __init__(self, list):
+        self.list = list
+        self.words = set(list)
 
+    def __getitem__(self, index):
+        found = not FEATURE_WORDS[index].isdisjoint(self.words)
+        if not found and FEATURE_PHRASES[index] is not None:
+            found = matchPhrases(self.list, FEATURE_PHRASES[index]) != 0
+        return found == FEATURES[index].found
 
-def has_adverb(list):
-    adverb = ["this", "that", "there", "which", "where", "who", "whose", "when"]
-    for x in adverb:
-        if x in list:
-            return False
-    return True
+    def __len__(self):
+        return FEATURE_COUNT
 
 
-def has_prep(list):
-    prep = ["in", "on", "at", "to", "for", "by", "of", "with", "and", "or"] # "in" in both lang
-    for x in prep:
-        if x in list:
-            return False
-    return True
+def ngramVector(list, buckets=NGRAM_BUCKETS):
+    """
+    Counting the character n-grams (1 to 4 letters, spaces included around
+    words) of a word list into hashed buckets, so that the size of the vector
+    is bounded without any vocabulary
+    :param list: single word list
+    :param buckets: the number of buckets
+    :return: a sparse vector, as a dictionary of {bucket: count}
+    """
+    text = " " + " ".join([x for x in list if x]) + " "
+    crc32 = zlib.crc32
+    vector = Counter()
+    for n in NGRAM_SIZES:
+        vector.update([crc32(text[i:i + n].encode("utf8")) % buckets for i in range(len(text) - n + 1)])
+    return vector
 
 
-def has_pron(list):
-    pron = ["i", "you", "he", "she", "it", "we", "they", "him", "her", "us", "them", "the", "a", "an"]
-    for x in pron:
-        if x in list:
-            return False
-    return True
+def unpack(mask, width=FEATURE_COUNT):
+    """
+    Expanding a feature mask into the boolean list form
+    :param mask: the integer from :func:`~featureMask`
+    :param width: the number of features
+    :return: a list of boolean
+    """
+    return [mask >> i & 1 == 1 for i in range(width)]
 
 
-def has_be(list):
-    be = ["am", "is", "are", "was", "were", "being", "been", "be"]
-    for x in be:
-        if x in list:
-            return False
-    return True
+def pack(list):
+    """
+    Packing the boolean list form into a feature mask
+    :param list: a list of boolean (without language type)
+    :return: an integer whose bit i is the value of feature i
+    """
+    mask = 0
+    for i in range(len(list)):
+        if list[i]:
+            mask |= 1 << i
+    return mask
 
 
 def recognize(sentence):
     """
     recognize each feature in order
     :param list: single word list
-    :return: a list of 10 boolean from previous features and its language type
+    :return: a list of FEATURE_COUNT boolean from the registry and its language type
     """
     lang = sentence[0]
     list = sentence[1]
-    result = []
-    result.append(has_een(list))
-    result.append(has_de(list))
-    result.append(has_bij(list))
-    result.append(has_van(list))
-    result.append(has_conj(list))
-    result.append(has_ij(list))
-    result.append(has_adverb(list))
-    result.append(has_prep(list))
-    result.append(has_pron(list))
-    result.append(has_be(list))
+    result = unpack(featureMask(list))
     result.append(lang)
     return result
 
@@ -136,33 +311,16 @@ def format(sentence):
     """
     Formatting a sentence to a list of words only (for testing set)
     """
-    sentence = sentence.lower().strip()
-    words = sentence.split(" ")
-    for i in range(len(words)):
-        for letter in words[i]:
-            if not letter.isalpha():
-                words[i] = words[i].replace(letter, "")
-    return words
+    return tokenize(sentence.strip())
 
 
 def findFeature(list):
     """
     recognize each feature in order
     :param list: single word list
-    :return: a list of 10 boolean from previous features
-    """
-    result = []
-    result.append(has_een(list))
-    result.append(has_de(list))
-    result.append(has_bij(list))
-    result.append(has_van(list))
-    result.append(has_conj(list))
-    result.append(has_ij(list))
-    result.append(has_adverb(list))
-    result.append(has_prep(list))
-    result.append(has_pron(list))
-    result.append(has_be(list))
-    return result
+    :return: a list of FEATURE_COUNT boolean from the registry
+    """
+    return unpack(featureMask(list))
 
 
 def main():
@@ -5,88 +5,336 @@ author: Chenghui Zhu    cz3348@rit.edu
 description: This file contains the main function of this project.
 """
 
+import io
 import math
+import os
+import profiler
+import queue
 import sys
-import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from feature import *
 from decision_tree import *
 from adaboost import *
+from naive_bayes import *
+from server import *
 
 DT_DEPTH = 10
-SAMPLE_ARGUMENTS = "train size_100.dat dtout1 dt", "train size_100.dat adaout1 ada", \
-                   "predict dtout1 test1.dat", "predict adaout1 test1.dat"
+DT_MIN_SAMPLES = 1
+DT_MIN_GAIN = 0
+DT_MAX_LEAVES = None
+DT_ORDER = "depth"
+BATCH_SIZE = 1000
+# max size of the part of a testing file predicted by one worker at a time
+CHUNK_BYTES = 1 << 22
+# max number of lines and max seconds a line waits before its prediction is written (stdin)
+STREAM_BATCH = 100
+FLUSH_INTERVAL = 0.1
+SAMPLE_ARGUMENTS = "train size_100.dat dtout1 dt", "train size_100.dat adaout1 ada", "train size_100.dat nbout1 nb", \
+                   "train size_100.dat tableout1 ada table", "train size_100.dat dtout2 dt --max-leaves 8 --order best", \
+                   "predict dtout1 test1.dat", "predict adaout1 test1.dat", \
+                   "predict dtout1 size_10000.dat --workers 4", \
+                   "predict dtout1 -", "predict dtout1 size_10000.dat --profile", "serve dtout1 5050"
 INFO = "Language Classification ver1.0\n-------------------------------------------------------------------------\n" \
-       "Function syntax:\n(1) train *training example file* *learning object output file* learning option(dt/ada)\n" \
-       "taking the example file as a training set and learning as either decision tree or ada boost\n\n" \
-       "(2) predict *learning object input file* *testing example file*\n" \
-       "predicting language type in the example file via previous learning object\n\n" \
-       "(3) help\nshowing help message\n\nSample argument:"
+       "Function syntax:\n(1) train *training example file* *learning object output file* learning option(dt/ada/nb) [table]\n" \
+       "taking the example file as a training set and learning as either decision tree, ada boost or naive bayes " \
+       "(over hashed character n-grams instead of the " + str(FEATURE_COUNT) + " features); each line of the " \
+       "example file is *language type*|*sentence*, with any number of language types\n" \
+       "(with 'table', the prediction of every feature combination is saved for constant time prediction; " \
+       "the features of the example file are saved next to it as *file*" + CACHE_SUFFIX + " and reused until " \
+       "the file changes, unless --no-cache is given)\n" \
+       "decision tree options: --depth N (default " + str(DT_DEPTH) + "), --min-samples N (per child of a split), " \
+       "--min-gain X (information gain of a split), --max-leaves N, --order depth/breadth/best " \
+       "(order of splitting nodes, best first keeps the most useful splits under --max-leaves), " \
+       "--workers N (subtrees of at least --parallel-samples N entries, default " + str(PARALLEL_SAMPLES) + \
+       ", are induced by N processes)\n\n" \
+       "(2) predict *learning object input file* *testing example file* [--workers N] [--lazy]\n" \
+       "predicting language type in the example file via previous learning object\n" \
+       "(with --workers, the file is split and predicted by N processes; with '-' as file name, " \
+       "lines are read from the standard input and predicted as they come; with --lazy, a decision tree only " \
+       "evaluates the features on the path of each line)\n\n" \
+       "(3) serve *learning object input file* [port]\n" \
+       "keeping the learning object loaded and answering each line sent to the port on localhost " \
+       "with its language type (default port " + str(SERVE_PORT) + ")\n\n" \
+       "(4) help\nshowing help message\n\n" \
+       "Add --profile to any function to print the time spent in each stage on the standard error, " \
+       "and --profile-json *file* to also save it as json (not counting --workers processes)\n\nSample argument:"
 
 
-def train(trainingSet, hypothesisOut, learningType):
+def train(trainingSet, hypothesisOut, learningType, table=False, depth=DT_DEPTH, minSamples=DT_MIN_SAMPLES,
+          minGain=DT_MIN_GAIN, maxLeaves=DT_MAX_LEAVES, order=DT_ORDER, workers=1,
+          parallelSamples=PARALLEL_SAMPLES):
     """
     The train function
-    :param trainingSet: input training set
+    :param trainingSet: input training set (a generator of n-gram vectors for nb)
     :param hypothesisOut: the output file name
-    :param learningType: the learning type (whether dt or ada)
+    :param learningType: the learning type (whether dt, ada or nb)
+    :param table: whether to save the learning object as a lookup table
+    :param depth: the max depth of the decision tree
+    :param minSamples: the min number of entries of each child of a tree split
+    :param minGain: the min information gain of a tree split
+    :param maxLeaves: the max number of leaf nodes of the tree (None for no limit)
+    :param order: the order of splitting tree nodes (depth, breadth or best)
+    :param workers: the number of processes inducing the decision tree
+    :param parallelSamples: the min number of entries of a subtree induced by another process
     :return: None
     """
     if learningType == "dt":
-        root = TreeNode(trainingSet)
+        root = TreeNode(FeatureMatrix(trainingSet))
         dt = DecisionTree(root)
-        dt.inducing(dt.root, DT_DEPTH)
+        dt.inducing(dt.root, depth, minSamples, minGain, maxLeaves, order, workers, parallelSamples)
         dt.getLeaf(dt.root)
-        dt.output(hypothesisOut)
+        hypothesis = dt.compile()
     elif learningType == "ada":
         ada = AdaBoost()
         ada.training(trainingSet, ada.hypothesis)
-        ada.output(hypothesisOut)
+        hypothesis = ada
+    elif learningType == "nb":
+        nb = NaiveBayes()
+        nb.training(trainingSet)
+        hypothesis = nb
     else:
-        raise IOError("invalid input learning type. (must be 'dt' or 'ada')")
+        raise IOError("invalid input learning type. (must be 'dt', 'ada' or 'nb')")
+    if table:
+        if not hasattr(hypothesis, "table"):
+            raise IOError("only a decision tree or ada boost can be saved as a table")
+        hypothesis = hypothesis.table()
+    hypothesis.output(hypothesisOut)
 
 
 def predict(hypothesis, file):
     """
-    The predict function
+    The predict function, reading and testing the file in batches
     :param hypothesis: the input learning object
     :param file: the testing example file
-    :return: the corresponding prediction list
+    :return: a generator of the corresponding predictions
     """
-    testSet = testSample(file)
-    return hypothesis.testAll(testSet)
+    for testSet in chunks(iterTestMask(file, extractor(hypothesis)), BATCH_SIZE):
+        for x in hypothesis.testAll(testSet):
+            yield x
 
 
-def inputfile(fileName):
+def streamPredict(hypothesis, input, output, batchSize=STREAM_BATCH, interval=FLUSH_INTERVAL):
     """
-    Inputing a file and transforming it into its original class
+    The predict function for a stream, writing the predictions of each batch
+    as soon as it is full or its first line has waited for interval seconds
+    :param hypothesis: the input learning object
+    :param input: the text stream of testing examples
+    :param output: the text stream of predictions
+    :param batchSize: the max number of lines predicted together
+    :param interval: the max seconds before a line is predicted
+    :return: None
+    """
+    lines = queue.Queue(batchSize * 4)
+
+    def read():
+        try:
+            for line in input:
+                lines.put(line)
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+    extract = extractor(hypothesis)
+    batch = []
+    deadline = 0
+    line = ""
+    while line is not None:
+        try:
+            if batch:
+                line = lines.get(timeout=max(0, deadline - time.monotonic()))
+            else:
+                line = lines.get()
+        except queue.Empty:
+            line = ""
+        if line:
+            if not batch:
+                deadline = time.monotonic() + interval
+            batch.append(extract(line))
+        if batch and (not line or len(batch) >= batchSize or time.monotonic() >= deadline):
+            output.write("\n".join(hypothesis.testAll(batch)) + "\n")
+            output.flush()
+            batch = []
+
+
+def splitFile(fileName, parts):
+    """
+    Splitting a file into byte ranges starting at the beginning of a line
+    :param fileName: the file name
+    :param parts: the wanted number of ranges
+    :return: a list of (start, end) byte positions, possibly fewer than parts
+    """
+    size = os.path.getsize(fileName)
+    bounds = [0]
+    with open(fileName, "rb") as file:
+        for i in range(1, parts):
+            file.seek(size * i // parts)
+            file.readline()
+            if file.tell() > bounds[-1]:
+                bounds.append(file.tell())
+    if bounds[-1] < size:
+        bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def startWorker(modelFile, lazy=False):
+    """
+    Loading the learning object once in each worker process
+    :param modelFile: the model file name
+    :param lazy: whether to evaluate the features lazily (decision tree only)
+    :return: None
+    """
+    global workerHypothesis
+    workerHypothesis = inputfile(modelFile, mapped=True, lazy=lazy)
+
+
+def predictRange(file, start, end):
+    """
+    Predicting a byte range of the testing example file in a worker process
+    :param file: the testing example file
+    :param start: the first byte of the range
+    :param end: the byte after the range
+    :return: the list of predictions of the lines in the range
+    """
+    with open(file, "rb") as data:
+        data.seek(start)
+        lines = io.TextIOWrapper(io.BytesIO(data.read(end - start)), encoding="utf8")
+    extract = extractor(workerHypothesis)
+    return workerHypothesis.testAll([extract(line) for line in lines])
+
+
+def parallelPredict(modelFile, file, workers, lazy=False):
+    """
+    The predict function running on several processes
+    :param modelFile: the model file name
+    :param file: the testing example file
+    :param workers: the number of processes
+    :param lazy: whether to evaluate the features lazily (decision tree only)
+    :return: a generator of the corresponding predictions, in file order
+    """
+    parts = max(workers, os.path.getsize(file) // CHUNK_BYTES + 1)
+    ranges = splitFile(file, parts)
+    starts = [start for start, end in ranges]
+    ends = [end for start, end in ranges]
+    with ProcessPoolExecutor(workers, initializer=startWorker, initargs=(modelFile, lazy)) as executor:
+        for prediction in executor.map(predictRange, [file] * len(ranges), starts, ends):
+            for x in prediction:
+                yield x
+
+
+def option(name, default):
+    """
+    Taking an option and its value out of the command arguments
+    :param name: the option name
+    :param default: the value when the option is not given
+    :return: the option value
+    """
+    if name not in sys.argv:
+        return default
+    i = sys.argv.index(name)
+    if i + 1 >= len(sys.argv):
+        raise IOError("missing value of option " + name)
+    value = sys.argv[i + 1]
+    del sys.argv[i:i + 2]
+    return value
+
+
+def inputfile(fileName, mapped=False, lazy=False):
+    """
+    Inputing a model file and transforming it into its learning object
     :param fileName: input file name
+    :param mapped: whether to use the model straight from a read-only memory
+    map of the file, shared with the other processes loading it
+    :param lazy: whether the decision tree evaluates the features of a line
+    only when a split on its path needs them
     :return: the learning object
     """
-    with open(fileName, "rb") as file:
-        data = pickle.load(file)
-        return data
+    kind, languages, arrays, key = readModel(fileName, mapped)
+    if lazy and kind != TREE_MODEL:
+        raise IOError("only a decision tree can evaluate the features lazily")
+    if kind in (TREE_MODEL, ADABOOST_MODEL, TABLE_MODEL) and key != FEATURE_KEY:
+        raise IOError("'" + fileName + "' was trained with other features. (it must be trained again)")
+    if kind == TREE_MODEL:
+        tree = readTree(languages, arrays)
+        tree.lazy = lazy
+        return tree
+    elif kind == ADABOOST_MODEL:
+        return readAdaBoost(languages, arrays)
+    elif kind == TABLE_MODEL:
+        return readTable(languages, arrays)
+    elif kind == NAIVE_BAYES_MODEL:
+        return readNaiveBayes(languages, arrays)
+    else:
+        raise IOError("unknown model kind in '" + fileName + "'")
 
 
 def main():
+    profiling = "--profile" in sys.argv
+    if profiling:
+        sys.argv.remove("--profile")
+    profileFile = option("--profile-json", None)
+    profile = None
+    if profiling or profileFile is not None:
+        profile = profiler.enable()
     if sys.argv[1].lower() == "train":
-        trainingSet = sample(sys.argv[2])
+        depth = int(option("--depth", DT_DEPTH))
+        minSamples = int(option("--min-samples", DT_MIN_SAMPLES))
+        minGain = float(option("--min-gain", DT_MIN_GAIN))
+        maxLeaves = option("--max-leaves", DT_MAX_LEAVES)
+        if maxLeaves is not None:
+            maxLeaves = int(maxLeaves)
+        order = option("--order", DT_ORDER).lower()
+        workers = int(option("--workers", 1))
+        parallelSamples = int(option("--parallel-samples", PARALLEL_SAMPLES))
+        caching = "--no-cache" not in sys.argv
+        if not caching:
+            sys.argv.remove("--no-cache")
         hypothesisOut = sys.argv[3]
         learningType = sys.argv[4].lower()
-        train(trainingSet, hypothesisOut, learningType)
-        fx = lambda x: "decision tree" if x == "dt" else ("ada boost" if x == "ada" else "???")
+        if learningType == "nb":
+            trainingSet = iterNgramSample(sys.argv[2])
+        elif caching:
+            trainingSet = cachedSample(sys.argv[2])
+        else:
+            trainingSet = packedSample(sys.argv[2])
+        if len(sys.argv) > 5 and sys.argv[5].lower() != "table":
+            raise IOError("invalid input training mode. (must be 'table' or nothing)")
+        train(trainingSet, hypothesisOut, learningType, len(sys.argv) > 5, depth, minSamples, minGain,
+              maxLeaves, order, workers, parallelSamples)
+        fx = lambda x: {"dt": "decision tree", "ada": "ada boost", "nb": "naive bayes"}.get(x, "???")
         print("Training data: '" + sys.argv[2] + "' with " +
               fx(learningType) + ". Object saved as: '" + sys.argv[3] + "'")
     elif sys.argv[1].lower() == "predict":
-        hypothesis = inputfile(sys.argv[2])
+        workers = int(option("--workers", 1))
+        lazy = "--lazy" in sys.argv
+        if lazy:
+            sys.argv.remove("--lazy")
         testFile = sys.argv[3]
-        prediction = predict(hypothesis, testFile)
-        for x in prediction:
-            print(x)
+        if testFile == "-":
+            hypothesis = inputfile(sys.argv[2], mapped=True, lazy=lazy)
+            input = io.TextIOWrapper(sys.stdin.buffer, encoding="utf8", errors="replace")
+            streamPredict(hypothesis, input, sys.stdout)
+        else:
+            if workers > 1:
+                prediction = parallelPredict(sys.argv[2], testFile, workers, lazy)
+            else:
+                hypothesis = inputfile(sys.argv[2], mapped=True, lazy=lazy)
+                prediction = predict(hypothesis, testFile)
+            for x in prediction:
+                print(x)
+    elif sys.argv[1].lower() == "serve":
+        hypothesis = inputfile(sys.argv[2], mapped=True)
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else SERVE_PORT
+        print("Serving '" + sys.argv[2] + "' on " + SERVE_HOST + ":" + str(port))
+        serve(hypothesis, SERVE_HOST, port, BATCH_SIZE)
     elif sys.argv[1].lower() == "help":
         print(INFO)
         print(SAMPLE_ARGUMENTS)
     else:
-        raise IOError("invalid input entry. (available function: train/predict/help)")
+        raise IOError("invalid input entry. (available function: train/predict/serve/help)")
+    if profile is not None:
+        profiler.output(profile, profileFile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+file: model.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the binary model file format used to save and
+load learning objects. A model file is a header, the language types and a few
+typed arrays (little-endian, each aligned to 8 bytes), so loading it never
+runs any code from the file, and the arrays can be used straight from a
+read-only memory map shared by every process loading the same model.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+MAGIC = b"LDMF"
+# version 2: the key of the features follows the header
+VERSION = 2
+# kinds of learning object
+TREE_MODEL = 1
+ADABOOST_MODEL = 2
+TABLE_MODEL = 3
+# not a learning object: the cached features of an example file
+FEATURE_SET = 4
+NAIVE_BAYES_MODEL = 5
+# magic, version, kind, number of language types, number of arrays
+HEADER = struct.Struct("<4sHHHH")
+# the key of the features a learning object was trained with (all zero bytes
+# for the learning objects not using them)
+KEY_SIZE = 32
+# typecode, item size, number of items
+ARRAY_HEADER = struct.Struct("<cBxxI")
+ALIGNMENT = 8
+
+
+def padding(size):
+    """
+    Calculating the bytes needed to align a position
+    :param size: the current position
+    :return: the number of padding bytes
+    """
+    return -size % ALIGNMENT
+
+
+def writeModel(fileName, kind, languages, arrays, key=bytes(KEY_SIZE)):
+    """
+    Writing a learning object into a model file
+    :param fileName: the output file name
+    :param kind: the kind of learning object (TREE_MODEL, ADABOOST_MODEL...)
+    :param languages: the language types used by the arrays
+    :param arrays: the list of arrays describing the learning object (arrays,
+    or memoryviews of a model loaded with mapped=True)
+    :param key: the key of the features used by the learning object (see
+    :data:`~feature.FEATURE_KEY`)
+    :return: None
+    """
+    if len(key) != KEY_SIZE:
+        raise ValueError("the key of the features must be " + str(KEY_SIZE) + " bytes long")
+    data = bytearray(HEADER.pack(MAGIC, VERSION, kind, len(languages), len(arrays)))
+    data += key
+    for language in languages:
+        name = language.encode("utf8")
+        data += struct.pack("<B", len(name)) + name
+    data += bytes(padding(len(data)))
+    for values in arrays:
+        values = array(getattr(values, "typecode", None) or values.format, values)
+        if sys.byteorder == "big":
+            values.byteswap()
+        data += ARRAY_HEADER.pack(values.typecode.encode(), values.itemsize, len(values))
+        data += values.tobytes()
+        data += bytes(padding(len(data)))
+    # replaced in one step, so that a process mapping the old file keeps it,
+    # from a temporary file of its own, so that concurrent writers never
+    # replace the file by one another's half-written one
+    descriptor, temp = tempfile.mkstemp(prefix=os.path.basename(fileName) + ".",
+                                        dir=os.path.dirname(os.path.abspath(fileName)))
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        # mkstemp() makes the file private to its owner, unlike open()
+        if os.path.exists(fileName):
+            os.chmod(temp, os.stat(fileName).st_mode & 0o777)
+        else:
+            os.chmod(temp, 0o644)
+        os.replace(temp, fileName)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def readModel(fileName, mapped=False):
+    """
+    Reading a model file
+    :param fileName: the input file name
+    :param mapped: whether to map the file in memory instead of reading it. The
+    arrays are then read-only memoryviews of the file (only on little-endian
+    machines, the file is read normally otherwise)
+    :return: the kind of learning object, its language types, its arrays and
+    the key of its features (None for a model written before the key was saved)
+    """
+    mapped = mapped and sys.byteorder == "little"
+    with open(fileName, "rb") as file:
+        if mapped and os.fstat(file.fileno()).st_size > 0:
+            data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            mapped = False
+            data = file.read()
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise IOError("'" + fileName + "' is not a model file. (models saved with pickle must be trained again)")
+    magic, version, kind, languageCount, arrayCount = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise IOError("'" + fileName + "' needs a newer version of this program. (model version " + str(version) + ")")
+    position = HEADER.size
+    key = None
+    if version >= 2:
+        if position + KEY_SIZE > len(data):
+            raise IOError("'" + fileName + "' is truncated.")
+        key = bytes(data[position:position + KEY_SIZE])
+        position += KEY_SIZE
+    languages = []
+    for _ in range(languageCount):
+        if position >= len(data):
+            raise IOError("'" + fileName + "' is truncated.")
+        length = data[position]
+        languages.append(bytes(data[position + 1:position + 1 + length]).decode("utf8"))
+        position += 1 + length
+    position += padding(position)
+    arrays = []
+    for _ in range(arrayCount):
+        if position + ARRAY_HEADER.size > len(data):
+            raise IOError("'" + fileName + "' is truncated.")
+        typecode, itemsize, count = ARRAY_HEADER.unpack_from(data, position)
+        values = array(typecode.decode())
+        if values.itemsize != itemsize:
+            raise IOError("'" + fileName + "' has an array type not supported on this platform.")
+        position += ARRAY_HEADER.size
+        if position + count * itemsize > len(data):
+            raise IOError("'" + fileName + "' is truncated.")
+        if mapped:
+            values = data[position:position + count * itemsize].cast(values.typecode)
+        else:
+            values.frombytes(data[position:position + count * itemsize])
+            if sys.byteorder == "big":
+                values.byteswap()
+        arrays.append(values)
+        position += count * itemsize
+        position += padding(position)
+    return kind, languages, arrays, key
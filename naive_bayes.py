@@ -0,0 +1,118 @@
+"""
+file: naive_bayes.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the naive bayes learning algorithm over the
+hashed character n-gram vectors of the sentences. Unlike the decision tree and
+ada boost, it learns from thousands of sparse counts instead of 10 features.
+"""
+
+import math
+from array import array
+from feature import *
+from decision_tree import *
+
+# additive smoothing of the n-gram counts
+NB_ALPHA = 0.1
+
+
+class NaiveBayes:
+    """
+    NaiveBayes class represents a multinomial naive bayes classifier
+    self.languages: the language types, in order of first appearance
+    self.buckets: the number of buckets of the n-gram vectors
+    self.alpha: the additive smoothing of the counts
+    self.prior: the log probability of each language type
+    self.likelihood: the log probability of each bucket for each language
+    type (one row of self.buckets values per language type)
+    """
+    def __init__(self, buckets=NGRAM_BUCKETS, alpha=NB_ALPHA):
+        self.languages = []
+        self.buckets = buckets
+        self.alpha = alpha
+        self.prior = array("d")
+        self.likelihood = array("d")
+
+    def training(self, example):
+        """
+        Counting the n-grams of every language type in one pass over the
+        training set, which is never held in memory as a whole
+        :param example: an iterable of (n-gram vector, language type), such
+        as :func:`~iterNgramSample`
+        :return: None
+        """
+        languages = []
+        counts = []
+        sentences = []
+        for vector, language in example:
+            if language not in languages:
+                languages.append(language)
+                counts.append(array("d", [0.0]) * self.buckets)
+                sentences.append(0)
+            c = languages.index(language)
+            sentences[c] += 1
+            row = counts[c]
+            for k, n in vector.items():
+                row[k] += n
+        total = sum(sentences)
+        self.languages = languages
+        self.prior = array("d", [math.log(x / total) for x in sentences])
+        self.likelihood = array("d")
+        for row in counts:
+            base = math.log(sum(row) + self.alpha * self.buckets)
+            self.likelihood.extend([math.log(x + self.alpha) - base for x in row])
+
+    def extract(self, line):
+        """
+        Making the n-gram vector of a line of a testing example file
+        :param line: the line (without language type)
+        :return: the n-gram vector
+        """
+        return ngramVector(format(line), self.buckets)
+
+    def testSingle(self, vector):
+        """
+        Testing a single entry, find the corresponding language type prediction
+        :param vector: an n-gram vector
+        :return: the language type
+        """
+        best = None
+        result = None
+        likelihood = self.likelihood
+        for c in range(len(self.languages)):
+            base = c * self.buckets
+            score = self.prior[c] + sum([likelihood[base + k] * n for k, n in vector.items()])
+            if best is None or score > best:
+                best = score
+                result = self.languages[c]
+        return result
+
+    def testAll(self, list):
+        """
+        Testing all entries from a testing set
+        :param list: the testing set
+        :return: a list of all prediction
+        """
+        return [self.testSingle(x) for x in list]
+
+    def output(self, fileName):
+        """
+        Outputing the naive bayes object into a model file
+        :param fileName: the output file name
+        :return: None
+        """
+        writeModel(fileName, NAIVE_BAYES_MODEL, self.languages, [self.prior, self.likelihood])
+
+
+def readNaiveBayes(languages, arrays):
+    """
+    Creating a naive bayes object from the content of a model file
+    :param languages: the language types of the model
+    :param arrays: the arrays of the model
+    :return: the :class:`~NaiveBayes` object
+    """
+    nb = NaiveBayes(len(arrays[1]) // max(1, len(languages)))
+    nb.languages = languages
+    nb.prior = arrays[0]
+    nb.likelihood = arrays[1]
+    return nb
@@ -0,0 +1,197 @@
+"""
+file: profiler.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the optional per-stage profiler of the train
+and predict pipeline. Enabling it replaces the functions of each stage by
+timed versions in every loaded module of this project, so nothing is added to
+the pipeline while it is disabled. The time of a stage excludes the stages it
+calls (e.g. reading a file excludes tokenizing its lines).
+"""
+
+import functools
+import inspect
+import json
+import sys
+import time
+
+# the pipeline stages and their functions ("Class.method" for methods)
+STAGES = [("read", ["iterSample", "iterTestSample", "iterTestMask", "packedSample", "cachedSample",
+                    "iterNgramSample"]),
+          ("tokenize", ["convert", "format"]),
+          ("features", ["recognize", "findFeature", "featureMask", "ngramVector"]),
+          ("induce", ["DecisionTree.inducing"]),
+          ("boost", ["AdaBoost.training"]),
+          ("bayes", ["NaiveBayes.training"]),
+          ("predict", ["DecisionTree.testAll", "CompiledTree.testAll", "TablePredictor.testAll",
+                       "AdaBoost.testAll", "NaiveBayes.testAll"]),
+          ("load", ["readModel"]),
+          ("save", ["writeModel"])]
+# stages whose items are the entries of the first argument after self, or of
+# the result, instead of one per call (generators count what they yield)
+ARGUMENT_ITEMS = ["boost", "predict"]
+RESULT_ITEMS = ["read"]
+MODULES = ["feature", "decision_tree", "adaboost", "naive_bayes", "model", "server", "language", "__main__"]
+
+
+class Profiler:
+    """
+    Profiler class represents the statistics of a profiled run
+    self.stages: a dictionary of {stage: [seconds, calls, items]}
+    self.stack: the [start time, time of called stages, stage] of each running
+    stage
+    """
+    def __init__(self):
+        self.stages = {}
+        self.stack = []
+
+    def enter(self, stage):
+        """
+        Starting the timer of a stage
+        :param stage: the stage name
+        :return: None
+        """
+        self.stack.append([time.perf_counter(), 0.0, stage])
+
+    def inside(self, stage):
+        """
+        Checking whether a stage is running (e.g. a reading function called
+        by another one, whose calls and items are then only counted once)
+        :param stage: the stage name
+        :return: True if the stage is in the stack
+        """
+        for x in self.stack:
+            if x[2] == stage:
+                return True
+        return False
+
+    def leave(self, stage, calls, items):
+        """
+        Stopping the timer of the last started stage
+        :param stage: the stage name
+        :param calls: the number of calls to count
+        :param items: the number of items to count
+        :return: None
+        """
+        start, inner, _ = self.stack.pop()
+        duration = time.perf_counter() - start
+        if self.stack:
+            self.stack[-1][1] += duration
+        if stage not in self.stages:
+            self.stages[stage] = [0.0, 0, 0]
+        self.stages[stage][0] += duration - inner
+        if not self.inside(stage):
+            self.stages[stage][1] += calls
+            self.stages[stage][2] += items
+
+    def timed(self, function, stage):
+        """
+        Creating the timed version of a function
+        :param function: the function (or generator function)
+        :param stage: the stage name
+        :return: the timed function
+        """
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator(*args, **kwargs):
+                self.enter(stage)
+                try:
+                    iterator = function(*args, **kwargs)
+                finally:
+                    self.leave(stage, 1, 0)
+                while True:
+                    self.enter(stage)
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        self.leave(stage, 0, 0)
+                    if not self.inside(stage):
+                        self.stages[stage][2] += 1
+                    yield item
+            return generator
+
+        @functools.wraps(function)
+        def timedFunction(*args, **kwargs):
+            self.enter(stage)
+            items = 1
+            try:
+                result = function(*args, **kwargs)
+                if stage in ARGUMENT_ITEMS:
+                    items = len(args[1])
+                elif stage in RESULT_ITEMS:
+                    items = len(result)
+                return result
+            finally:
+                self.leave(stage, 1, items)
+        return timedFunction
+
+    def report(self):
+        """
+        Giving the statistics in pipeline order
+        :return: a list of dictionaries (stage, seconds, calls, items)
+        """
+        result = []
+        for stage, functions in STAGES:
+            if stage in self.stages:
+                seconds, calls, items = self.stages[stage]
+                result.append({"stage": stage, "seconds": seconds, "calls": calls, "items": items})
+        return result
+
+    def table(self):
+        """
+        Formatting the statistics as a table
+        :return: the table text
+        """
+        lines = ["%-10s %10s %10s %10s %12s" % ("stage", "seconds", "calls", "items", "items/s")]
+        for x in self.report():
+            rate = x["items"] / x["seconds"] if x["seconds"] > 0 else 0
+            lines.append("%-10s %10.4f %10d %10d %12.0f" % (x["stage"], x["seconds"], x["calls"],
+                                                             x["items"], rate))
+        return "\n".join(lines)
+
+
+def enable():
+    """
+    Replacing the functions of every stage by their timed version in the
+    loaded modules of this project
+    :return: the :class:`~Profiler` collecting the statistics
+    """
+    profiler = Profiler()
+    timed = {}
+    for stage, functions in STAGES:
+        for name in functions:
+            for moduleName in MODULES:
+                module = sys.modules.get(moduleName)
+                if module is None:
+                    continue
+                owner = module
+                attribute = name
+                if "." in name:
+                    className, attribute = name.split(".")
+                    owner = getattr(module, className, None)
+                    if owner is None or attribute not in owner.__dict__:
+                        continue
+                function = getattr(owner, attribute, None)
+                if function is None:
+                    continue
+                if function not in timed:
+                    timed[function] = profiler.timed(function, stage)
+                    timed[timed[function]] = timed[function]
+                setattr(owner, attribute, timed[function])
+    return profiler
+
+
+def output(profiler, fileName=None):
+    """
+    Printing the statistics on the standard error stream, and saving them as
+    json if a file name is given
+    :param profiler: the :class:`~Profiler`
+    :param fileName: the json file name (or None)
+    :return: None
+    """
+    print(profiler.table(), file=sys.stderr)
+    if fileName is not None:
+        with open(fileName, "w", encoding="utf8") as file:
+            json.dump(profiler.report(), file, indent=2)
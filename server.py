@@ -0,0 +1,128 @@
+"""
+file: server.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the prediction server, keeping a learning
+object loaded and answering classification requests over a local socket.
+Each request is one line of text (utf8) and its answer is the language type
+on one line, in the same order. Lines from all connections are tested
+together in batches.
+"""
+
+import asyncio
+from feature import *
+from decision_tree import *
+
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 5050
+# max length of a request line (the default of asyncio is only 64 KiB)
+LINE_LIMIT = 1 << 24
+
+
+class PredictionServer:
+    """
+    PredictionServer class represents a running prediction server
+    self.hypothesis: the learning object used for prediction
+    self.batchSize: the max number of lines tested together
+    self.extract: the function making the tested entry of a line
+    self.queue: the (entry, future answer) pairs waiting for a batch
+    """
+    def __init__(self, hypothesis, batchSize=1000):
+        self.hypothesis = hypothesis
+        self.extract = extractor(hypothesis)
+        self.batchSize = batchSize
+        self.queue = None
+
+    def submit(self, line):
+        """
+        Adding a line to the next batch
+        :param line: the received line (bytes)
+        :return: the future of its language type
+        """
+        answer = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((self.extract(line.decode("utf8", "replace")), answer))
+        return answer
+
+    async def batching(self):
+        """
+        Testing the waiting lines in batches for as long as the server runs
+        :return: None
+        """
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batchSize and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            prediction = self.hypothesis.testAll([entry for entry, answer in batch])
+            for i in range(len(batch)):
+                if not batch[i][1].cancelled():
+                    batch[i][1].set_result(prediction[i])
+
+    async def handle(self, reader, writer):
+        """
+        Answering all lines of one connection in order
+        :param reader: the connection input stream
+        :param writer: the connection output stream
+        :return: None
+        """
+        # bounded: reading pauses while the client does not read the replies
+        answers = asyncio.Queue(self.batchSize)
+
+        async def reply():
+            lost = False
+            while True:
+                answer = await answers.get()
+                if answer is None:
+                    break
+                answer = await answer
+                if lost:
+                    continue
+                try:
+                    writer.write((answer + "\n").encode("utf8"))
+                    await writer.drain()
+                except ConnectionError:
+                    # still emptying the answers so that reading never waits
+                    # on them, until the closed connection ends it
+                    lost = True
+                    writer.close()
+
+        replying = asyncio.ensure_future(reply())
+        try:
+            async for line in reader:
+                await answers.put(self.submit(line))
+            await answers.put(None)
+            await replying
+        except (ConnectionError, ValueError):
+            # connection lost, or a line longer than LINE_LIMIT: the
+            # connection is closed after the answers already written
+            pass
+        finally:
+            replying.cancel()
+            writer.close()
+
+    async def run(self, host=SERVE_HOST, port=SERVE_PORT):
+        """
+        Serving until the process is stopped
+        :param host: the address to listen on
+        :param port: the port to listen on
+        :return: None
+        """
+        self.queue = asyncio.Queue()
+        batching = asyncio.ensure_future(self.batching())
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batching.cancel()
+
+
+def serve(hypothesis, host=SERVE_HOST, port=SERVE_PORT, batchSize=1000):
+    """
+    Running a prediction server with a learning object
+    :param hypothesis: the learning object
+    :param host: the address to listen on
+    :param port: the port to listen on
+    :param batchSize: the max number of lines tested together
+    :return: None
+    """
+    asyncio.run(PredictionServer(hypothesis, batchSize).run(host, port))
@@ -0,0 +1,65 @@
+"""
+file: test_benchmark.py
+language: python3
+author: Chenghui Zhu    cz3348@rit.edu
+description: This file contains the tests of the regression check of the
+benchmark.
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from benchmark import MIN_SENTENCES, MIN_SLOWDOWN, report, run
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def quietReport(benchmark, baseline):
+    """
+    Comparing results without printing them
+    :param benchmark: the results from :func:`~benchmark.run`
+    :param baseline: previous results from :func:`~benchmark.run`
+    :return: the regressions from :func:`~benchmark.report`
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return report(benchmark, baseline)
+
+
+def result(seconds, sentences):
+    """
+    Making the results of one stage of one file
+    :param seconds: the time of the stage
+    :param sentences: the number of lines of the file
+    :return: the results in the form of :func:`~benchmark.run`
+    """
+    return {"python": "", "repeat": 1, "results": {"file": {"stage": {
+        "seconds": seconds, "sentences": sentences, "rate": sentences / seconds, "peak": 0}}}}
+
+
+class TestReport(unittest.TestCase):
+    def testBaselineAgainstItself(self):
+        benchmark = run([os.path.join(DIRECTORY, "size_100.dat")], 1)
+        with tempfile.TemporaryDirectory() as directory:
+            baselineFile = os.path.join(directory, "baseline.json")
+            with open(baselineFile, "w", encoding="utf8") as file:
+                json.dump(benchmark, file)
+            with open(baselineFile, encoding="utf8") as file:
+                baseline = json.load(file)
+        self.assertEqual(quietReport(baseline, baseline), [])
+
+    def testSlowerStage(self):
+        self.assertEqual(quietReport(result(1.0, MIN_SENTENCES), result(0.5, MIN_SENTENCES)), [("file", "stage")])
+
+    def testShortStageNotCompared(self):
+        seconds = MIN_SLOWDOWN / 2
+        self.assertEqual(quietReport(result(seconds, MIN_SENTENCES), result(seconds / 2, MIN_SENTENCES)), [])
+
+    def testSmallFileNotCompared(self):
+        self.assertEqual(quietReport(result(1.0, MIN_SENTENCES - 1), result(0.5, MIN_SENTENCES - 1)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()